@@ -1,9 +1,20 @@
+import asyncio
+import functools
+import hashlib
+import io
 import json
 import logging
-from typing import Any, Dict, List, Optional
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
+from itertools import chain
 
-from ..models import ChatMessage, ConversationSummary
+import msgpack
+
+from ..models import ChatMessage, ConversationSummary, MessageType
 from ..cache import get_redis_client
 from ..config import Settings
 from .nlp_processor import NLPProcessor
@@ -11,27 +22,157 @@ from ..connectors.manager import ConnectorManager
 
 logger = logging.getLogger(__name__)
 
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Redis key prefixes for per-session conversation history and topic sets
+_CONV_PREFIX = "conversation:"
+_TOPICS_PREFIX = "topics:"
+
+# Fixed response headers
+_HEALTH_HEADER = "🔍 **System Health Status**\n\n**Data Sources:**"
+_SERVICES_HEADER = "📋 **Available Services:**\n\n"
+
+# Set while a streaming request is processed; generated response text is pushed onto it
+_stream_sink: ContextVar[Optional[asyncio.Queue]] = ContextVar('_stream_sink', default=None)
+
+# Redis channel announcing that connector services/metrics have changed
+CONNECTOR_CHANGED_CHANNEL = "connector_changed"
+
+class ChatMessageView(NamedTuple):
+    """Lightweight read-only message used for history handled inside the engine"""
+    content: str
+    sender: str
+    timestamp: datetime
+    metadata: Optional[Dict[str, Any]] = None
+
 class ConversationEngine:
     """Manages conversation flow and context for monitoring interactions"""
     
+    # Common monitoring topics, each checked on its own. Keywords must start a word (a letter
+    # may not precede them) so "program" is not RAM; underscores count as boundaries so
+    # metric names such as node_cpu_seconds still match. "ram" must also end the word.
+    _TOPIC_RES = (
+        ('CPU Performance', re.compile(r"(?<![a-z])(?:cpu|processor)", re.IGNORECASE)),
+        ('Memory Usage', re.compile(r"(?<![a-z])(?:memory|ram(?![a-z]))", re.IGNORECASE)),
+        ('Disk I/O', re.compile(r"(?<![a-z])(?:disk|storage)", re.IGNORECASE)),
+        ('Network', re.compile(r"(?<![a-z])(?:network|bandwidth)", re.IGNORECASE)),
+        ('Alerts', re.compile(r"(?<![a-z])(?:alert|alarm)", re.IGNORECASE)),
+        ('System Health', re.compile(r"(?<![a-z])(?:health|status)", re.IGNORECASE)),
+        ('Services', re.compile(r"(?<![a-z])(?:service|app)", re.IGNORECASE)),
+    )
+    
+    # Whole-message phrasings that map straight to a handler; anything longer goes through NLP
+    _FAST_INTENTS = [
+        (re.compile(r"^\s*(?:(?:show|check|get)\s+)?(?:(?:the|system|overall)\s+)*(?:health|status)\s*[?.!]*\s*$", re.I), "health"),
+        (re.compile(r"^\s*(?:(?:show|list|get)\s+)?(?:(?:the|all|active|current)\s+)*(?:alerts?|alarms?)\s*[?.!]*\s*$", re.I), "alerts"),
+        (re.compile(r"^\s*(?:(?:show|list|get)\s+)?(?:(?:the|all|available)\s+)*(?:services?|apps?)\s*[?.!]*\s*$", re.I), "services"),
+    ]
+    
+    # Live state that must not be answered from the response cache; connector health has its own shorter TTL
+    _UNCACHED_QUERY_TYPES = frozenset(('health', 'alerts'))
+    
     def __init__(self, settings: Settings, connector_manager: ConnectorManager):
         self.settings = settings
         self.connector_manager = connector_manager
         self.nlp_processor = NLPProcessor(settings)
-        self.redis = get_redis_client()
+        self.redis = None
         
         # Conversation settings
         self.max_conversation_length = 50
         self.context_retention_hours = 24
         
+        # Last services/metrics fingerprint, reused while the connector catalog is unchanged
+        self._ctx_hash_inputs = None
+        self._ctx_hash = ""
+        
+        # Small in-process LRU of recent parses in front of the Redis parse cache
+        self._parse_memo: OrderedDict = OrderedDict()
+        self._parse_memo_size = 256
+        
+        # In-process connector catalog cache as (monotonic timestamp, data)
+        self._svc_cache = None
+        self._metrics_cache = None
+        self._svc_lock = asyncio.Lock()
+        self._metrics_lock = asyncio.Lock()
+        
+        # In-flight executions keyed by (session_id, message/context hash)
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        
+        # Connector names, refreshed when the manager's version changes
+        self._connectors_tuple_cache: Tuple[str, ...] = ()
+        self._connectors_version = -1
+        
+        # Caps backend metric queries in flight across all messages
+        self._sem = asyncio.Semaphore(settings.connector_concurrency)
+        
+        # Handlers keyed by the canonical query_type emitted by the NLP processor
+        self._handlers = {
+            'alerts': self._handle_alerts_query,
+            'health': self._handle_health_query,
+            'services': self._handle_services_query,
+            'metrics': self._handle_metrics_query
+        }
+    
     async def process_message(self, message: str, session_id: str, user_context: Dict[str, Any] = None) -> ChatMessage:
+        """Process a user message, sharing one execution between concurrent identical requests"""
+        # Requests only share an execution when their context matches too
+        context_fingerprint = json.dumps(user_context or {}, sort_keys=True, default=str)
+        key = (session_id, hashlib.sha1(f"{message}\n{context_fingerprint}".encode()).hexdigest())
+        
+        shared = self._inflight.get(key)
+        if shared is None:
+            shared = asyncio.create_task(self._process_message(message, session_id, user_context))
+            self._inflight[key] = shared
+            shared.add_done_callback(functools.partial(self._shared_done, key))
+        # Shielded so a disconnecting client cancels only its own wait, never the shared work
+        return await asyncio.shield(shared)
+    
+    def _shared_done(self, key: Tuple[str, str], shared: asyncio.Task):
+        """Forget a finished shared execution, retrieving its error in case no caller is left"""
+        if self._inflight.get(key) is shared:
+            del self._inflight[key]
+        if not shared.cancelled():
+            shared.exception()
+    
+    async def process_message_stream(self, message: str, session_id: str, user_context: Dict[str, Any] = None) -> AsyncIterator[str]:
+        """Process a user message, yielding the response text as it is generated
+        
+        Generated answers stream token by token; responses built locally (health,
+        services, cached or error replies) arrive as a single chunk. The full
+        exchange is stored exactly as process_message stores it.
+        """
+        sink: asyncio.Queue = asyncio.Queue()
+        token = _stream_sink.set(sink)
+        try:
+            # The task copies the current context, so its handlers see the sink
+            task = asyncio.create_task(self._process_message(message, session_id, user_context))
+        finally:
+            _stream_sink.reset(token)
+        task.add_done_callback(lambda _: sink.put_nowait(None))
+        
+        streamed = False
+        try:
+            while (chunk := await sink.get()) is not None:
+                streamed = True
+                yield chunk
+            assistant_message = await task
+        finally:
+            if not task.done():
+                task.cancel()
+        
+        if not streamed:
+            yield assistant_message.content
+    
+    async def _process_message(self, message: str, session_id: str, user_context: Dict[str, Any] = None) -> ChatMessage:
         """Process a user message and generate a response"""
         try:
             # Store user message
+            now = datetime.now()
             user_message = ChatMessage(
+                type=MessageType.USER,
                 content=message,
-                sender="user",
-                timestamp=datetime.now()
+                timestamp=now
             )
             
             await self._store_message(session_id, user_message)
@@ -39,35 +180,32 @@ class ConversationEngine:
             # Get conversation context
             conversation_history = await self._get_conversation_history(session_id)
             
-            # Get available data sources
-            available_services = await self.connector_manager.get_all_services()
-            all_services = []
-            for services in available_services.values():
-                all_services.extend(services)
-            
-            metrics_summary = await self.connector_manager.get_all_metrics_summary()
-            all_metrics = []
-            for summary in metrics_summary.values():
-                all_metrics.extend(summary.get('metric_names', []))
-            
-            # Parse the user query
-            parsed_query = await self.nlp_processor.parse_user_query(
-                message, all_services, all_metrics
-            )
-            
-            # Execute the query based on intent
-            response_content = await self._execute_query_and_respond(
-                parsed_query, conversation_history, user_context or {}
-            )
+            # Trivial health/alerts/services requests skip the catalog lookup and NLP parse
+            message_norm = self._normalize_message(message)
+            parsed_query = self._fast_intent(message)
+            if parsed_query is None:
+                parsed_query = await self._parse_query(message, message_norm)
+            
+            # Execute the query based on intent unless the same answer was just given
+            cacheable = parsed_query.get('query_type') not in self._UNCACHED_QUERY_TYPES
+            response_content = await self._response_cache_get(message_norm, parsed_query) if cacheable else None
+            if response_content is None:
+                response_content, complete = await self._execute_query_and_respond(
+                    parsed_query, conversation_history, user_context or {}
+                )
+                # Error and stand-in replies are not cached, so a brief outage is not repeated
+                if cacheable and complete:
+                    await self._response_cache_set(message_norm, parsed_query, response_content)
             
-            # Create assistant response
+            # Create assistant response, stamped once the answer is ready
+            now = datetime.now()
             assistant_message = ChatMessage(
+                type=MessageType.ASSISTANT,
                 content=response_content,
-                sender="assistant",
-                timestamp=datetime.now(),
+                timestamp=now,
                 metadata={
                     "parsed_query": parsed_query,
-                    "connectors_used": list(self.connector_manager.list_connectors())
+                    "connectors_used": self._connector_names()
                 }
             )
             
@@ -76,200 +214,271 @@ class ConversationEngine:
             return assistant_message
             
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
+            logger.error("Error processing message: %s", e)
+            error_text = str(e)
             error_message = ChatMessage(
-                content=f"I encountered an error processing your request: {str(e)}. Please try rephrasing your question.",
-                sender="assistant",
+                type=MessageType.ERROR,
+                content=f"I encountered an error processing your request: {error_text}. Please try rephrasing your question.",
                 timestamp=datetime.now(),
-                metadata={"error": str(e)}
+                metadata={"error": error_text}
             )
             
             await self._store_message(session_id, error_message)
             return error_message
     
-    async def _execute_query_and_respond(self, parsed_query: Dict[str, Any], history: List[ChatMessage], context: Dict[str, Any]) -> str:
-        """Execute the parsed query and generate a response"""
+    def _fast_intent(self, message: str) -> Optional[Dict[str, Any]]:
+        """Recognize short, unambiguous health/alerts/services requests without the NLP parse"""
+        for pattern, intent in self._FAST_INTENTS:
+            if pattern.match(message):
+                return {
+                    'intent': intent,
+                    'query_type': intent,
+                    'original_query': message,
+                    'metrics': [],
+                    'services': []
+                }
+        return None
+    
+    async def _parse_query(self, message: str, message_norm: str) -> Dict[str, Any]:
+        """Parse the user query against the connector catalog, reusing a cached parse for recurring questions"""
+        # Get available data sources
+        available_services, metrics_summary = await self._gather_with_timeout(
+            self._cached_services(),
+            self._cached_metrics_summary()
+        )
+        all_services = list(chain.from_iterable((available_services or {}).values()))
+        all_metrics = list(chain.from_iterable(
+            summary.get('metric_names', ()) for summary in (metrics_summary or {}).values()
+        ))
+        
+        ctx_hash = self._context_hash(all_services, all_metrics)
+        parsed_query = await self._parse_cache_get(message_norm, ctx_hash)
+        if parsed_query is None:
+            parsed_query = await self.nlp_processor.parse_user_query(
+                message, all_services, all_metrics
+            )
+            if 'error' not in parsed_query:
+                await self._parse_cache_set(message_norm, ctx_hash, parsed_query)
+        else:
+            parsed_query['original_query'] = message
+        
+        return parsed_query
+    
+    async def _execute_query_and_respond(self, parsed_query: Dict[str, Any], history: List[ChatMessageView], context: Dict[str, Any]) -> Tuple[str, bool]:
+        """Execute the parsed query and generate a response
+        
+        Returns the response text and whether it was built from complete data; error,
+        fallback and no-data replies report False.
+        """
         try:
-            intent = parsed_query.get('intent', 'unknown')
-            query_type = parsed_query.get('query_type', 'metrics')
-            
-            # Handle different query types
-            if query_type == 'alerts' or intent == 'alerts':
-                return await self._handle_alerts_query(parsed_query, context)
-            elif query_type == 'health' or intent == 'health':
-                return await self._handle_health_query(parsed_query, context)
-            elif query_type == 'services' or 'service' in parsed_query.get('original_query', '').lower():
-                return await self._handle_services_query(parsed_query, context)
-            else:
-                return await self._handle_metrics_query(parsed_query, context)
+            handler = self._handlers.get(parsed_query.get('query_type'), self._handle_metrics_query)
+            return await handler(parsed_query, context)
                 
         except Exception as e:
-            logger.error(f"Error executing query: {e}")
-            return f"I had trouble retrieving that information. Error: {str(e)}"
+            logger.error("Error executing query: %s", e)
+            return f"I had trouble retrieving that information. Error: {str(e)}", False
     
-    async def _handle_metrics_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> str:
+    async def _handle_metrics_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> Tuple[str, bool]:
         """Handle metrics queries"""
         try:
             metrics = parsed_query.get('metrics', [])
             services = parsed_query.get('services', [])
             time_range = parsed_query.get('time_range', '1h')
             
-            # Query all connectors
-            all_results = {}
+            # Build one query per available connector and run them concurrently
+            tasks = {}
             
-            # Try Prometheus first
             prometheus_conn = self.connector_manager.get_connector('prometheus')
             if prometheus_conn:
                 prom_query = await self.nlp_processor.generate_prometheus_query(parsed_query)
                 if prom_query:
-                    prom_results = await prometheus_conn.query_metrics(prom_query, time_range=time_range)
-                    if prom_results:
-                        all_results['prometheus'] = prom_results
+                    tasks['prometheus'] = self._bounded(
+                        prometheus_conn.query_metrics(prom_query, time_range=time_range)
+                    )
             
-            # Try Azure Monitor
             azure_conn = self.connector_manager.get_connector('azure_monitor')
             if azure_conn and metrics:
                 # For Azure, we need specific resource context
-                azure_results = await azure_conn.query_metrics(
+                tasks['azure_monitor'] = self._bounded(azure_conn.query_metrics(
                     ','.join(metrics), 
                     timespan=1 if time_range == '1h' else 24
-                )
-                if azure_results:
-                    all_results['azure_monitor'] = azure_results
+                ))
+            
+            results = await self._gather_with_timeout(*tasks.values())
+            # A connector that failed or timed out leaves the answer incomplete
+            complete = all(result is not None for result in results)
+            all_results = {
+                name: connector_results
+                for name, connector_results in zip(tasks.keys(), results)
+                if connector_results
+            }
             
             # Generate response
-            all_metrics_data = []
-            for connector_results in all_results.values():
-                all_metrics_data.extend(connector_results)
+            all_metrics_data = list(chain.from_iterable(all_results.values()))
             
             if not all_metrics_data:
-                return self._no_data_response(parsed_query)
+                return self._no_data_response(parsed_query), False
             
             # Use NLP to generate natural language response
-            response = await self.nlp_processor.generate_response(
+            response, generated = await self._generate_response(
                 parsed_query.get('original_query', ''),
                 all_metrics_data,
                 [],
                 {'time_range': time_range, 'connectors': list(all_results.keys())}
             )
             
-            return response
+            return response, complete and generated
             
         except Exception as e:
-            logger.error(f"Error handling metrics query: {e}")
-            return f"I couldn't retrieve the metrics data. Error: {str(e)}"
+            logger.error("Error handling metrics query: %s", e)
+            return f"I couldn't retrieve the metrics data. Error: {str(e)}", False
+    
+    async def _generate_response(self, query: str, metrics: List[Any], alerts: List[Any], context: Dict[str, Any]) -> Tuple[str, bool]:
+        """Generate the natural language answer, streaming it to the current request when it streams
+        
+        Returns the text and whether the model produced it; a failed generation falls back to
+        a summary line, or keeps whatever was already streamed, and reports False.
+        """
+        sink = _stream_sink.get()
+        parts = []
+        try:
+            async for chunk in self.nlp_processor.generate_response_stream(query, metrics, alerts, context, fallback=False):
+                parts.append(chunk)
+                if sink is not None:
+                    sink.put_nowait(chunk)
+        except Exception:
+            if parts:
+                return ''.join(parts).strip(), False
+            return self.nlp_processor.fallback_response(query, metrics, alerts), False
+        return ''.join(parts).strip(), True
     
-    async def _handle_alerts_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> str:
+    async def _handle_alerts_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> Tuple[str, bool]:
         """Handle alerts queries"""
         try:
-            all_alerts_results = await self.connector_manager.get_all_alerts()
+            all_alerts_results = await self.connector_manager.get_all_alerts(
+                concurrency=self.settings.connector_concurrency
+            )
             
-            all_alerts = []
-            for connector_alerts in all_alerts_results.values():
-                all_alerts.extend(connector_alerts)
+            all_alerts = list(chain.from_iterable(all_alerts_results.values()))
             
             if not all_alerts:
-                return "Great news! No active alerts found in your monitoring systems."
+                return "Great news! No active alerts found in your monitoring systems.", True
             
             # Generate response
-            response = await self.nlp_processor.generate_response(
+            return await self._generate_response(
                 parsed_query.get('original_query', ''),
                 [],
                 all_alerts,
                 {'connectors': list(all_alerts_results.keys())}
             )
             
-            return response
-            
         except Exception as e:
-            logger.error(f"Error handling alerts query: {e}")
-            return f"I couldn't retrieve the alerts information. Error: {str(e)}"
+            logger.error("Error handling alerts query: %s", e)
+            return f"I couldn't retrieve the alerts information. Error: {str(e)}", False
     
-    async def _handle_health_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> str:
+    async def _handle_health_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> Tuple[str, bool]:
         """Handle health/status queries"""
         try:
-            # Check connector health
-            health_results = await self.connector_manager.health_check_all()
-            
-            # Get basic system metrics
-            healthy_connectors = await self.connector_manager.get_healthy_connectors()
-            
-            # Try to get "up" metrics from healthy connectors
-            system_status = []
-            for connector in healthy_connectors:
-                try:
-                    if connector.name == 'prometheus':
-                        up_metrics = await connector.query_metrics("up")
-                        system_status.extend(up_metrics)
-                except Exception:
-                    continue
+            # Check connector health, fetch alerts and query "up" on Prometheus all at once;
+            # an unreachable connector simply contributes no "up" samples
+            prometheus_connectors = [
+                self.connector_manager.get_connector(name)
+                for name in self.connector_manager.list_connectors()
+                if name == 'prometheus'
+            ]
+            health_results, all_alerts, *up_results = await self._gather_with_timeout(
+                self.connector_manager.health_check_all(concurrency=self.settings.connector_concurrency),
+                self.connector_manager.get_all_alerts(concurrency=self.settings.connector_concurrency),
+                *(connector.query_metrics("up") for connector in prometheus_connectors)
+            )
+            complete = health_results is not None and all_alerts is not None
+            health_results = health_results or {}
+            system_status = list(chain.from_iterable(result for result in up_results if result))
             
             # Build response
-            connector_status = []
+            buf = io.StringIO()
+            w = buf.write
+            w(_HEALTH_HEADER)
             for name, is_healthy in health_results.items():
-                status = "✅ Online" if is_healthy else "❌ Offline"
-                connector_status.append(f"{name.title()}: {status}")
-            
-            response_parts = [
-                "🔍 **System Health Status**",
-                "",
-                "**Data Sources:**"
-            ]
-            response_parts.extend([f"- {status}" for status in connector_status])
+                w("\n- ")
+                w(name.title())
+                w(": ")
+                w("✅ Online" if is_healthy else "❌ Offline")
             
             if system_status:
-                up_services = len([m for m in system_status if m.value == 1.0])
-                total_services = len(system_status)
-                response_parts.extend([
-                    "",
-                    f"**Services Status:** {up_services}/{total_services} services are healthy"
-                ])
-            
-            # Get recent alerts for context
-            try:
-                all_alerts = await self.connector_manager.get_all_alerts()
+                up_services = sum(1 for m in system_status if m.value == 1.0)
+                w(f"\n\n**Services Status:** {up_services}/{len(system_status)} services are healthy")
+            
+            # Add recent alerts for context
+            if all_alerts is not None:
                 total_alerts = sum(len(alerts) for alerts in all_alerts.values())
                 if total_alerts > 0:
-                    response_parts.append(f"⚠️  {total_alerts} active alerts requiring attention")
+                    w(f"\n⚠️  {total_alerts} active alerts requiring attention")
                 else:
-                    response_parts.append("✅ No active alerts")
-            except Exception:
-                pass
+                    w("\n✅ No active alerts")
             
-            return "\n".join(response_parts)
+            return buf.getvalue(), complete
             
         except Exception as e:
-            logger.error(f"Error handling health query: {e}")
-            return f"I couldn't retrieve the health information. Error: {str(e)}"
+            logger.error("Error handling health query: %s", e)
+            return f"I couldn't retrieve the health information. Error: {str(e)}", False
     
-    async def _handle_services_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> str:
+    async def _handle_services_query(self, parsed_query: Dict[str, Any], context: Dict[str, Any]) -> Tuple[str, bool]:
         """Handle services/applications queries"""
         try:
-            all_services = await self.connector_manager.get_all_services()
+            all_services = await self.connector_manager.get_all_services(
+                concurrency=self.settings.connector_concurrency
+            )
             
             if not any(all_services.values()):
-                return "No services found in the monitoring systems. Please check your configuration."
+                return "No services found in the monitoring systems. Please check your configuration.", False
             
-            response_parts = ["📋 **Available Services:**", ""]
+            buf = io.StringIO()
+            w = buf.write
+            w(_SERVICES_HEADER)
             
+            total_services = 0
+            source_count = 0
             for connector_name, services in all_services.items():
                 if services:
-                    response_parts.append(f"**{connector_name.title()} ({len(services)} services):**")
+                    total_services += len(services)
+                    source_count += 1
+                    w(f"**{connector_name.title()} ({len(services)} services):**\n")
                     # Show first 10 services to avoid overwhelming response
                     for service in services[:10]:
-                        response_parts.append(f"- {service}")
+                        w("- ")
+                        w(service)
+                        w("\n")
                     if len(services) > 10:
-                        response_parts.append(f"... and {len(services) - 10} more")
-                    response_parts.append("")
+                        w(f"... and {len(services) - 10} more\n")
+                    w("\n")
             
-            total_services = sum(len(services) for services in all_services.values())
-            response_parts.append(f"**Total:** {total_services} services across {len([c for c, s in all_services.items() if s])} data sources")
+            w(f"**Total:** {total_services} services across {source_count} data sources")
             
-            return "\n".join(response_parts)
+            return buf.getvalue(), True
             
         except Exception as e:
-            logger.error(f"Error handling services query: {e}")
-            return f"I couldn't retrieve the services information. Error: {str(e)}"
+            logger.error("Error handling services query: %s", e)
+            return f"I couldn't retrieve the services information. Error: {str(e)}", False
+    
+    async def _bounded(self, aw: Awaitable) -> Any:
+        """Await a connector call while holding the engine-wide connector semaphore"""
+        async with self._sem:
+            return await aw
+    
+    async def _gather_with_timeout(self, *aws) -> List[Any]:
+        """Run connector calls concurrently, each bounded by the connector timeout"""
+        # Failed or timed out calls yield None so one slow backend cannot hold the response
+        results = await asyncio.gather(
+            *(asyncio.wait_for(aw, timeout=self.settings.connector_timeout) for aw in aws),
+            return_exceptions=True
+        )
+        
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Connector call failed or timed out: %r", result)
+        
+        return [None if isinstance(result, Exception) else result for result in results]
     
     def _no_data_response(self, parsed_query: Dict[str, Any]) -> str:
         """Generate response when no data is found"""
@@ -290,96 +499,272 @@ class ConversationEngine:
         else:
             return f"{base_response}\n\nTry asking about available services or check system health."
     
+    async def _cached_services(self) -> Dict[str, List[str]]:
+        """Get services from all connectors, cached in-process for a short TTL"""
+        return await self._cached_catalog(
+            '_svc_cache', self._svc_lock,
+            lambda: self.connector_manager.get_all_services(concurrency=self.settings.connector_concurrency)
+        )
+    
+    async def _cached_metrics_summary(self) -> Dict[str, Dict]:
+        """Get metrics summaries from all connectors, cached in-process for a short TTL"""
+        return await self._cached_catalog(
+            '_metrics_cache', self._metrics_lock,
+            lambda: self.connector_manager.get_all_metrics_summary(concurrency=self.settings.connector_concurrency)
+        )
+    
+    async def _cached_catalog(self, attr: str, lock: asyncio.Lock, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached catalog entry, refreshing it under a lock so concurrent misses fetch once"""
+        cached = getattr(self, attr)
+        if cached and time.monotonic() - cached[0] < self.settings.catalog_cache_ttl:
+            return cached[1]
+        
+        async with lock:
+            # Another request may have refreshed the entry while we waited
+            cached = getattr(self, attr)
+            if cached and time.monotonic() - cached[0] < self.settings.catalog_cache_ttl:
+                return cached[1]
+            
+            data = await fetch()
+            setattr(self, attr, (time.monotonic(), data))
+            return data
+    
+    def invalidate_catalog_cache(self):
+        """Drop the cached services and metrics summaries"""
+        self._svc_cache = None
+        self._metrics_cache = None
+    
+    async def watch_connector_changes(self):
+        """Invalidate the catalog cache whenever a connector change is published to Redis"""
+        try:
+            redis = await self._get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(CONNECTOR_CHANGED_CHANNEL)
+        except Exception as e:
+            logger.warning("Connector change notifications unavailable: %s", e)
+            return
+        
+        try:
+            async for message in pubsub.listen():
+                if message.get('type') == 'message':
+                    logger.info("Connector change published - invalidating catalog cache")
+                    self.invalidate_catalog_cache()
+        finally:
+            await pubsub.unsubscribe(CONNECTOR_CHANGED_CHANNEL)
+    
+    def _connector_names(self) -> Tuple[str, ...]:
+        """Get the configured connector names, rebuilt only when they change"""
+        version = self.connector_manager.version()
+        if version != self._connectors_version:
+            self._connectors_tuple_cache = tuple(self.connector_manager.list_connectors())
+            self._connectors_version = version
+        return self._connectors_tuple_cache
+    
+    async def _get_redis(self):
+        """Get the shared Redis client, resolving it on first use"""
+        if self.redis is None:
+            self.redis = await get_redis_client()
+        return self.redis
+    
+    def _normalize_message(self, message: str) -> str:
+        """Normalize a message for cache lookups: lowercase, no punctuation, collapsed whitespace"""
+        return _WHITESPACE_RE.sub(" ", _PUNCT_RE.sub("", message.lower())).strip()
+    
+    def _context_hash(self, services: List[str], metrics: List[str]) -> str:
+        """Fingerprint the available services and metrics"""
+        if self._ctx_hash_inputs != (services, metrics):
+            fingerprint = "\n".join(sorted(services) + sorted(metrics))
+            self._ctx_hash = hashlib.sha1(fingerprint.encode()).hexdigest()[:12]
+            self._ctx_hash_inputs = (services, metrics)
+        return self._ctx_hash
+    
+    async def _cache_get(self, key: str) -> Any:
+        """Read a JSON value from the Redis cache, treating errors as a miss"""
+        try:
+            redis = await self._get_redis()
+            cached = await redis.get(key)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning("Cache lookup failed for %s: %s", key, e)
+            return None
+    
+    async def _cache_set(self, key: str, value: Any, ttl: int):
+        """Write a JSON value to the Redis cache with a TTL"""
+        if ttl <= 0:
+            return
+        try:
+            redis = await self._get_redis()
+            await redis.setex(key, ttl, json.dumps(value, default=str))
+        except Exception as e:
+            logger.warning("Cache write failed for %s: %s", key, e)
+    
+    def _parse_cache_key(self, message_norm: str, ctx_hash: str) -> str:
+        """Build the cache key for a parsed query"""
+        return "parse:" + hashlib.sha1(f"{message_norm}|{ctx_hash}".encode()).hexdigest()
+    
+    def _response_cache_key(self, message_norm: str, parsed_query: Dict[str, Any]) -> str:
+        """Build the cache key for a generated response"""
+        canonical = json.dumps(
+            {**parsed_query, 'original_query': message_norm}, sort_keys=True, default=str
+        )
+        time_range = parsed_query.get('time_range', '1h')
+        return "resp:" + hashlib.sha1(f"{canonical}|{time_range}".encode()).hexdigest()
+    
+    async def _parse_cache_get(self, message_norm: str, ctx_hash: str) -> Optional[Dict[str, Any]]:
+        """Get a cached parse for a normalized message"""
+        memo_key = (message_norm, ctx_hash)
+        parsed_query = self._parse_memo.get(memo_key)
+        if parsed_query is not None:
+            self._parse_memo.move_to_end(memo_key)
+            return dict(parsed_query)
+        
+        parsed_query = await self._cache_get(self._parse_cache_key(message_norm, ctx_hash))
+        if parsed_query is not None:
+            self._parse_memo_put(memo_key, parsed_query)
+        return parsed_query
+    
+    async def _parse_cache_set(self, message_norm: str, ctx_hash: str, parsed_query: Dict[str, Any]):
+        """Cache the parse of a normalized message"""
+        self._parse_memo_put((message_norm, ctx_hash), parsed_query)
+        await self._cache_set(
+            self._parse_cache_key(message_norm, ctx_hash), parsed_query, self.settings.parse_cache_ttl
+        )
+    
+    def _parse_memo_put(self, memo_key: Tuple[str, str], parsed_query: Dict[str, Any]):
+        """Remember a parse in the in-process LRU, evicting the least recently used entry"""
+        self._parse_memo[memo_key] = dict(parsed_query)
+        self._parse_memo.move_to_end(memo_key)
+        if len(self._parse_memo) > self._parse_memo_size:
+            self._parse_memo.popitem(last=False)
+    
+    async def _response_cache_get(self, message_norm: str, parsed_query: Dict[str, Any]) -> Optional[str]:
+        """Get a recently generated response for the same parsed query"""
+        return await self._cache_get(self._response_cache_key(message_norm, parsed_query))
+    
+    async def _response_cache_set(self, message_norm: str, parsed_query: Dict[str, Any], response: str):
+        """Cache a generated response briefly so rapid repeats skip connector fan-out"""
+        await self._cache_set(
+            self._response_cache_key(message_norm, parsed_query), response, self.settings.response_cache_ttl
+        )
+    
     async def _store_message(self, session_id: str, message: ChatMessage):
         """Store message in conversation history"""
         try:
-            key = f"conversation:{session_id}"
+            key = _CONV_PREFIX + session_id
             message_data = {
                 'content': message.content,
-                'sender': message.sender,
-                'timestamp': message.timestamp.isoformat(),
+                'sender': message.type.value,
+                'ts': message.timestamp.timestamp(),
                 'metadata': message.metadata or {}
             }
-            
-            # Store as list item with expiration
-            await self.redis.lpush(key, json.dumps(message_data))
-            await self.redis.ltrim(key, 0, self.max_conversation_length - 1)  # Keep last N messages
-            await self.redis.expire(key, self.context_retention_hours * 3600)  # Set expiration
+            payload = msgpack.packb(message_data, use_bin_type=True)
+            
+            # Topics are extracted once at write time so summaries never rescan history
+            topics = self._extract_topics_from_text(message.content) if message.type == MessageType.USER else set()
+            
+            # Store as list item with expiration in a single round-trip
+            redis = await self._get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                # Appended oldest-first, so the list reads in chronological order
+                pipe.rpush(key, payload)
+                pipe.ltrim(key, -self.max_conversation_length, -1)  # Keep last N messages
+                pipe.expire(key, self.context_retention_hours * 3600)  # Set expiration
+                if topics:
+                    topics_key = _TOPICS_PREFIX + session_id
+                    pipe.sadd(topics_key, *topics)
+                    pipe.expire(topics_key, self.context_retention_hours * 3600)
+                await pipe.execute()
             
         except Exception as e:
-            logger.error(f"Error storing message: {e}")
+            logger.error("Error storing message: %s", e)
     
-    async def _get_conversation_history(self, session_id: str, limit: int = 10) -> List[ChatMessage]:
+    async def _get_conversation_history(self, session_id: str, limit: int = 10) -> List[ChatMessageView]:
         """Get recent conversation history"""
         try:
-            key = f"conversation:{session_id}"
-            messages_data = await self.redis.lrange(key, 0, limit - 1)
-            
-            messages = []
-            for msg_data in messages_data:
-                try:
-                    msg_dict = json.loads(msg_data)
-                    message = ChatMessage(
-                        content=msg_dict['content'],
-                        sender=msg_dict['sender'],
-                        timestamp=datetime.fromisoformat(msg_dict['timestamp']),
-                        metadata=msg_dict.get('metadata')
-                    )
-                    messages.append(message)
-                except (json.JSONDecodeError, KeyError):
-                    continue
-            
-            return list(reversed(messages))  # Return in chronological order
+            key = _CONV_PREFIX + session_id
+            redis = await self._get_redis()
+            messages_data = await redis.lrange(key, -limit, -1)
+            if not messages_data:
+                return []
+            
+            # Decode the whole window in one pass, skipping entries without the required fields
+            msg_dicts = [msgpack.unpackb(msg_data, raw=False) for msg_data in messages_data]
+            return [
+                ChatMessageView(m['content'], m['sender'], datetime.fromtimestamp(m['ts']), m.get('metadata'))
+                for m in msg_dicts
+                if isinstance(m, dict) and 'content' in m and 'sender' in m and 'ts' in m
+            ]
             
         except Exception as e:
-            logger.error(f"Error getting conversation history: {e}")
+            logger.error("Error getting conversation history: %s", e)
             return []
     
     async def get_conversation_summary(self, session_id: str) -> ConversationSummary:
         """Get a summary of the conversation"""
         try:
-            history = await self._get_conversation_history(session_id)
+            # Topics were stored at write time, so no history list is scanned here
+            message_count, start_time, last_activity, topics = await self._summary_snapshot(session_id)
+            if not message_count:
+                return self._empty_summary(session_id)
             
             return ConversationSummary(
                 session_id=session_id,
-                message_count=len(history),
-                start_time=history[0].timestamp if history else datetime.now(),
-                last_activity=history[-1].timestamp if history else datetime.now(),
-                topics=self._extract_topics(history)
+                message_count=message_count,
+                start_time=start_time,
+                last_activity=last_activity,
+                topics=sorted(topic.decode() for topic in topics)
             )
             
         except Exception as e:
-            logger.error(f"Error getting conversation summary: {e}")
-            return ConversationSummary(
-                session_id=session_id,
-                message_count=0,
-                start_time=datetime.now(),
-                last_activity=datetime.now(),
-                topics=[]
-            )
+            logger.error("Error getting conversation summary: %s", e)
+            return self._empty_summary(session_id)
+    
+    def _empty_summary(self, session_id: str) -> ConversationSummary:
+        """Build the summary returned for sessions without any stored messages"""
+        now = datetime.now()
+        return ConversationSummary(
+            session_id=session_id,
+            message_count=0,
+            start_time=now,
+            last_activity=now,
+            topics=[]
+        )
     
-    def _extract_topics(self, messages: List[ChatMessage]) -> List[str]:
+    async def _summary_snapshot(self, session_id: str) -> Tuple[int, Optional[datetime], Optional[datetime], set]:
+        """Get the message count, oldest/newest timestamps and topics in one round-trip"""
+        key = _CONV_PREFIX + session_id
+        redis = await self._get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.llen(key)
+            pipe.lindex(key, 0)   # Oldest message
+            pipe.lindex(key, -1)  # Newest message
+            pipe.smembers(_TOPICS_PREFIX + session_id)
+            message_count, oldest, newest, topics = await pipe.execute()
+        
+        if not message_count:
+            return 0, None, None, set()
+        
+        return (
+            message_count,
+            self._decode_timestamp(oldest),
+            self._decode_timestamp(newest),
+            topics
+        )
+    
+    def _decode_timestamp(self, payload: bytes) -> datetime:
+        """Read the timestamp of a stored message payload"""
+        return datetime.fromtimestamp(msgpack.unpackb(payload, raw=False)['ts'])
+    
+    def _extract_topics(self, messages: List[ChatMessageView]) -> List[str]:
         """Extract main topics from conversation"""
         topics = set()
         
         for message in messages:
             if message.sender == "user":
-                content_lower = message.content.lower()
-                
-                # Look for common monitoring topics
-                if any(word in content_lower for word in ['cpu', 'processor']):
-                    topics.add('CPU Performance')
-                if any(word in content_lower for word in ['memory', 'ram']):
-                    topics.add('Memory Usage')
-                if any(word in content_lower for word in ['disk', 'storage']):
-                    topics.add('Disk I/O')
-                if any(word in content_lower for word in ['network', 'bandwidth']):
-                    topics.add('Network')
-                if any(word in content_lower for word in ['alert', 'alarm']):
-                    topics.add('Alerts')
-                if any(word in content_lower for word in ['health', 'status']):
-                    topics.add('System Health')
-                if any(word in content_lower for word in ['service', 'app']):
-                    topics.add('Services')
+                topics.update(self._extract_topics_from_text(message.content))
         
-        return list(topics)
\ No newline at end of file
+        return list(topics)
+    
+    def _extract_topics_from_text(self, content: str) -> set:
+        """Extract monitoring topics mentioned in a single message"""
+        return {topic for topic, pattern in self._TOPIC_RES if pattern.search(content)}
\ No newline at end of file
@@ -1,129 +1,414 @@
+import asyncio
+import difflib
+import functools
+import hashlib
+import httpx
+import numpy as np
 import openai
-import json
+import orjson
 import re
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
-from ..config import Settings
+from ..cache import get_redis_client, mget_json, mset_json
+from ..config import Settings, freeze_settings
 from ..models import ChatMessage, MetricData, AlertData
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# Pooled HTTP/2 client shared by every OpenAI client in the process
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client(settings: Settings) -> httpx.AsyncClient:
+    """Get or create the shared keep-alive HTTP client used for OpenAI calls"""
+    global _http_client
+    
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            timeout=httpx.Timeout(settings.query_timeout)
+        )
+    
+    return _http_client
+
+async def aclose():
+    """Close the shared OpenAI HTTP client"""
+    global _http_client
+    if _http_client:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("OpenAI HTTP client closed")
+
+# Intents answered by a fixed PromQL expression
+_FIXED_QUERIES = {
+    'alerts': "ALERTS{alertstate=\"firing\"}",
+    'health': "up"
+}
+
+# Category -> (metric used when the catalog has it, fallback expression), in priority order
+_CATEGORY_BASE_QUERIES = {
+    'cpu': ("cpu_usage_percent", "rate(cpu_seconds_total[5m]) * 100"),
+    'memory': ("memory_usage_percent", "memory_working_set_bytes"),
+    'network': (None, "rate(network_receive_bytes_total[5m])")
+}
+
+@functools.lru_cache(maxsize=1024)
+def _build_prometheus_query(intent: str, metrics: Tuple[str, ...], services: Tuple[str, ...],
+                            aggregation: Optional[str], mentions_health: bool) -> Optional[str]:
+    """Build a PromQL query from normalized components; memoized since it is a pure function"""
+    if not metrics and intent != 'alerts':
+        return None
+    
+    # Handle different query types
+    if intent == 'alerts':
+        return _FIXED_QUERIES['alerts']
+    if intent == 'health' or mentions_health:
+        return _FIXED_QUERIES['health']
+    
+    # Tag the metrics with their categories in one pass, then take the first category in priority order
+    lowered = [m.lower() for m in metrics]
+    metric_tags = {category for category in _CATEGORY_BASE_QUERIES for m in lowered if category in m}
+    category = next((c for c in _CATEGORY_BASE_QUERIES if c == intent or c in metric_tags), None)
+    
+    if category:
+        preferred, default = _CATEGORY_BASE_QUERIES[category]
+        base_query = preferred if preferred and preferred in metrics else default
+    else:
+        # Use first available metric
+        base_query = metrics[0] if metrics else "up"
+    
+    # Add service filters
+    if services:
+        service_filter = '|'.join(services)
+        if '{' in base_query:
+            # Insert into existing braces
+            base_query = base_query.replace('{', f'{{job=~"{service_filter}",', 1)
+        else:
+            # Add new braces
+            base_query = f"{base_query}{{job=~\"{service_filter}\"}}"
+    
+    # Add aggregation if needed
+    if aggregation and aggregation != 'raw':
+        agg_func = {
+            'avg': 'avg',
+            'sum': 'sum',
+            'max': 'max',
+            'min': 'min'
+        }.get(aggregation, 'avg')
+        
+        if services:
+            base_query = f"{agg_func} by (job) ({base_query})"
+        else:
+            base_query = f"{agg_func}({base_query})"
+    
+    return base_query
+
+class _KeywordMatcher:
+    """Finds which of a fixed list of names occur in a lowercased query
+    
+    Uses a pyahocorasick automaton (one pass over the query) when the package is
+    installed, otherwise falls back to substring checks against names lowercased once.
+    """
+    
+    def __init__(self, names: Tuple[str, ...]):
+        self.names = frozenset(names)
+        self.lowered = [(name.lower(), name) for name in names]
+        self.by_lower = {}
+        for lower, name in self.lowered:
+            self.by_lower.setdefault(lower, name)
+        
+        self._automaton = None
+        if ahocorasick is not None and self.lowered:
+            by_lower: Dict[str, List[str]] = {}
+            for lower, name in self.lowered:
+                if lower:
+                    by_lower.setdefault(lower, []).append(name)
+            if by_lower:
+                self._automaton = ahocorasick.Automaton()
+                for lower, originals in by_lower.items():
+                    self._automaton.add_word(lower, originals)
+                self._automaton.make_automaton()
+    
+    def find(self, query_lower: str) -> set:
+        """Get every name that appears as a substring of the query"""
+        if self._automaton is not None:
+            return {name for _, originals in self._automaton.iter(query_lower) for name in originals}
+        return {name for lower, name in self.lowered if lower and lower in query_lower}
+    
+    def containing(self, fragment: str) -> List[str]:
+        """Get names whose lowercased form contains fragment, in their original order"""
+        return [name for lower, name in self.lowered if fragment in lower]
+
+class _KeywordIntentClassifier:
+    """Scores a query against a weighted keyword table to pick an intent without calling OpenAI"""
+    
+    _TOKEN_RE = re.compile(r'[a-z0-9]+')
+    
+    # Weight of each token as evidence for an intent
+    _WEIGHTS = {
+        'cpu': {'cpu': 3.0, 'processor': 3.0, 'cores': 2.0, 'load': 1.5, 'utilization': 1.0},
+        'memory': {'memory': 3.0, 'ram': 3.0, 'mem': 3.0, 'heap': 2.0, 'oom': 2.5, 'swap': 2.0},
+        'network': {'network': 3.0, 'bandwidth': 3.0, 'traffic': 2.5, 'packets': 2.5, 'ingress': 2.0, 'egress': 2.0},
+        'alerts': {'alert': 3.0, 'alerts': 3.0, 'alarm': 3.0, 'alarms': 3.0, 'firing': 3.0, 'incident': 2.0, 'incidents': 2.0},
+        'health': {'health': 3.0, 'healthy': 3.0, 'status': 2.5, 'up': 1.0, 'down': 2.0, 'outage': 2.5},
+        'errors': {'error': 3.0, 'errors': 3.0, 'failure': 2.5, 'failures': 2.5, 'exception': 2.5, 'exceptions': 2.5, '5xx': 3.0},
+        'performance': {'latency': 3.0, 'throughput': 3.0, 'rps': 3.0, 'qps': 3.0, 'slow': 2.0, 'performance': 2.0}
+    }
+    
+    # Score mass reserved for "none of the above", so a single weak keyword is never confident
+    _PRIOR = 0.5
+    
+    def __init__(self):
+        self._token_weights: Dict[str, List[Tuple[str, float]]] = {}
+        for intent, weights in self._WEIGHTS.items():
+            for token, weight in weights.items():
+                self._token_weights.setdefault(token, []).append((intent, weight))
+    
+    def classify(self, query_lower: str) -> Tuple[Optional[str], float]:
+        """Get the best intent and its confidence (its share of the total score)"""
+        scores: Dict[str, float] = {}
+        for token in set(self._TOKEN_RE.findall(query_lower)):
+            for intent, weight in self._token_weights.get(token, ()):
+                scores[intent] = scores.get(intent, 0.0) + weight
+        
+        if not scores:
+            return None, 0.0
+        
+        intent = max(scores, key=scores.get)
+        return intent, scores[intent] / (sum(scores.values()) + self._PRIOR)
+
 class NLPProcessor:
     """Natural Language Processing for monitoring queries"""
     
+    # Patterns used on every parse, compiled once
+    _QUOTED_RE = re.compile(r'["\']([^"\']+)["\']')
+    _TIME_RE = re.compile(r'(\d+)\s*([mhds])')
+    _WORD_RE = re.compile(r'[a-z0-9_.-]{3,}')
+    
+    # Fields requested from the model for each analyzed query
+    _INTENT_FIELDS = """Extract and return JSON with:
+        - intent: main intent (cpu, memory, network, alerts, health, errors, performance)
+        - metrics: list of relevant metric names from available metrics
+        - services: list of relevant service names from available services
+        - time_range: time period (5m, 1h, 24h, etc.)
+        - aggregation: aggregation type (avg, sum, max, min, raw)
+        - query_type: type of query (metrics, alerts, logs, health)
+        - filters: any additional filters as key-value pairs"""
+    
+    _TIME_RANGES = {'minute': '1m', 'hour': '1h', 'day': '24h', 'week': '7d'}
+    
+    # Keywords for each aggregation, in priority order
+    _AGGREGATION_RES = [
+        ('avg', re.compile(r'\b(?:average|avg|mean)\b')),
+        ('sum', re.compile(r'\b(?:sum|total)\b')),
+        ('max', re.compile(r'\b(?:max|maximum|peak)\b')),
+        ('min', re.compile(r'\b(?:min|minimum|lowest)\b'))
+    ]
+    
+    # metric_patterns categories that are not intents of their own
+    _CATEGORY_INTENTS = {'disk': 'performance', 'latency': 'performance', 'throughput': 'performance'}
+    
     def __init__(self, settings: Settings):
-        self.settings = settings
-        openai.api_key = settings.openai_api_key
+        self.settings: Settings = settings
+        # Plain-attribute snapshot read on hot paths
+        self._cfg: SimpleNamespace = freeze_settings(settings)
+        self._client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=_get_http_client(settings)
+        )
         
         # Query templates and patterns
         self.metric_patterns = {
-            'cpu': ['cpu', 'processor', 'computation'],
-            'memory': ['memory', 'ram', 'mem'],
-            'disk': ['disk', 'storage', 'io', 'filesystem'],
-            'network': ['network', 'net', 'bandwidth', 'traffic'],
-            'latency': ['latency', 'response time', 'delay'],
-            'throughput': ['throughput', 'requests per second', 'rps', 'qps'],
-            'errors': ['error', 'failure', 'exception', 'fault']
+            'cpu': frozenset(['cpu', 'processor', 'computation']),
+            'memory': frozenset(['memory', 'ram', 'mem']),
+            'disk': frozenset(['disk', 'storage', 'io', 'filesystem']),
+            'network': frozenset(['network', 'net', 'bandwidth', 'traffic']),
+            'latency': frozenset(['latency', 'response time', 'delay']),
+            'throughput': frozenset(['throughput', 'requests per second', 'rps', 'qps']),
+            'errors': frozenset(['error', 'failure', 'exception', 'fault'])
         }
         
         self.time_patterns = {
-            'minute': ['last minute', '1m', '60s'],
-            'hour': ['last hour', '1h', 'hour ago'],
-            'day': ['today', 'last day', '24h', 'day ago'],
-            'week': ['this week', 'last week', '7d', 'week ago']
+            'minute': frozenset(['last minute', '1m', '60s']),
+            'hour': frozenset(['last hour', '1h', 'hour ago']),
+            'day': frozenset(['today', 'last day', '24h', 'day ago']),
+            'week': frozenset(['this week', 'last week', '7d', 'week ago'])
         }
         
+        # All metric categories in one regex; the named group that matched is the category
+        self._category_re = re.compile('|'.join(
+            f'(?P<{category}>{self._keywords_re(patterns).pattern})'
+            for category, patterns in self.metric_patterns.items()
+        ))
+        self._time_pattern_res = [
+            (self._TIME_RANGES[name], self._keywords_re(patterns)) for name, patterns in self.time_patterns.items()
+        ]
+        
         self.service_keywords = ['service', 'app', 'application', 'pod', 'container', 'instance']
+        
+        # Keyword matchers for the last seen metric/service catalogs, keyed by kind
+        self._matchers: Dict[str, Tuple[Tuple[str, ...], _KeywordMatcher]] = {}
+        
+        # Local intent scorer consulted before OpenAI
+        self._intent_clf = _KeywordIntentClassifier()
+        
+        # In-process LRU of OpenAI results as key -> (monotonic expiry, value), in front of Redis
+        self._ai_cache: OrderedDict = OrderedDict()
+        self._ai_cache_size = 512
     
     async def parse_user_query(self, query: str, available_services: List[str], available_metrics: List[str]) -> Dict[str, Any]:
         """Parse a natural language query into structured monitoring request"""
         try:
-            # Use OpenAI to understand the intent
-            intent = await self._analyze_intent_with_ai(query, available_services, available_metrics)
-            
-            # Extract components using patterns and AI results
-            components = {
-                'intent': intent.get('intent', 'unknown'),
-                'metrics': intent.get('metrics', self._extract_metrics(query, available_metrics)),
-                'services': intent.get('services', self._extract_services(query, available_services)),
-                'time_range': intent.get('time_range', self._extract_time_range(query)),
-                'aggregation': intent.get('aggregation', self._extract_aggregation(query)),
-                'filters': intent.get('filters', {}),
-                'query_type': intent.get('query_type', 'metrics'),
-                'original_query': query
-            }
+            # Unambiguous queries are parsed locally; OpenAI handles the rest
+            intent = None
+            if not self._cfg.force_ai_parse:
+                intent = self._pattern_parse_confident(query, available_services, available_metrics)
+            if intent is None:
+                intent = await self._analyze_intent_with_ai(query, available_services, available_metrics)
             
+            components = self._build_components(query, intent, available_services, available_metrics)
             logger.info(f"Parsed query: {query} -> {components}")
             return components
             
         except Exception as e:
             logger.error(f"Error parsing query '{query}': {e}")
-            return {
-                'intent': 'unknown',
-                'metrics': [],
-                'services': [],
-                'time_range': '1h',
-                'aggregation': 'avg',
-                'filters': {},
-                'query_type': 'metrics',
-                'original_query': query,
-                'error': str(e)
-            }
+            return self._error_components(query, e)
+    
+    async def parse_user_queries_batch(self, queries: List[str], available_services: List[str], available_metrics: List[str]) -> List[Dict[str, Any]]:
+        """Parse many queries at once for non-interactive callers (backfills, evaluations, digests)
+        
+        With enable_openai_batch_api the intents go through the OpenAI Batch API, which is
+        cheaper but may take up to its 24h completion window. Otherwise up to
+        openai_batch_max_queries queries are analyzed per chat completion.
+        """
+        if not queries:
+            return []
+        
+        # Probe the intent cache for the whole batch at once; only misses reach OpenAI
+        cache_keys = [self._intent_cache_key(query, available_services, available_metrics) for query in queries]
+        intents = await self._ai_cache_get_many(cache_keys)
+        pending = [i for i, intent in enumerate(intents) if intent is None]
+        
+        if pending:
+            pending_queries = [queries[i] for i in pending]
+            try:
+                if self._cfg.enable_openai_batch_api:
+                    analyzed = await self._analyze_intents_with_batch_api(pending_queries, available_services, available_metrics)
+                else:
+                    size = max(1, self._cfg.openai_batch_max_queries)
+                    chunks = await asyncio.gather(*(
+                        self._analyze_intents_combined(pending_queries[i:i + size], available_services, available_metrics)
+                        for i in range(0, len(pending_queries), size)
+                    ))
+                    analyzed = [intent for chunk in chunks for intent in chunk]
+            except Exception as e:
+                logger.error(f"Error analyzing batch of {len(pending_queries)} queries: {e}")
+                analyzed = [{}] * len(pending_queries)
+            
+            for i, intent in zip(pending, analyzed):
+                intents[i] = intent
+            await self._ai_cache_set_many({cache_keys[i]: intents[i] for i in pending if intents[i]})
+        
+        results = []
+        for query, intent in zip(queries, intents):
+            try:
+                results.append(self._build_components(query, intent, available_services, available_metrics))
+            except Exception as e:
+                logger.error(f"Error parsing query '{query}': {e}")
+                results.append(self._error_components(query, e))
+        
+        return results
+    
+    def _pattern_parse_confident(self, query: str, available_services: List[str], available_metrics: List[str]) -> Optional[Dict[str, Any]]:
+        """Parse a query with the pattern extractors alone, or None if the result would rely on defaults
+        
+        Confident means at least one metric matched and both the time range and the
+        aggregation were stated explicitly in the query.
+        """
+        metrics = self._extract_metrics(query, available_metrics)
+        if not metrics:
+            return None
+        
+        time_range = self._extract_time_range(query, default=None)
+        aggregation = self._extract_aggregation(query, default=None)
+        if time_range is None or aggregation is None:
+            return None
+        
+        query_lower = query.lower()
+        matched_categories = self._match_categories(query_lower)
+        category = next(
+            (category for category in self.metric_patterns if category in matched_categories),
+            'performance'
+        )
+        intent = self._CATEGORY_INTENTS.get(category, category)
+        
+        return {
+            'intent': intent,
+            'metrics': metrics,
+            'services': self._extract_services(query, available_services),
+            'time_range': time_range,
+            'aggregation': aggregation,
+            'query_type': 'metrics'
+        }
+    
+    def _build_components(self, query: str, intent: Dict[str, Any], available_services: List[str], available_metrics: List[str]) -> Dict[str, Any]:
+        """Combine the AI intent with pattern-based extraction into a structured request"""
+        intent_name = intent.get('intent', 'unknown')
+        return {
+            'intent': intent_name,
+            'metrics': intent.get('metrics', self._extract_metrics(query, available_metrics)),
+            'services': intent.get('services', self._extract_services(query, available_services)),
+            'time_range': intent.get('time_range', self._extract_time_range(query)),
+            'aggregation': intent.get('aggregation', self._extract_aggregation(query)),
+            'filters': intent.get('filters', {}),
+            'query_type': self._canonical_query_type(intent_name, intent.get('query_type', 'metrics'), query),
+            'original_query': query
+        }
+    
+    def _error_components(self, query: str, error: Exception) -> Dict[str, Any]:
+        """Structured request returned when a query could not be parsed"""
+        return {
+            'intent': 'unknown',
+            'metrics': [],
+            'services': [],
+            'time_range': '1h',
+            'aggregation': 'avg',
+            'filters': {},
+            'query_type': self._canonical_query_type('unknown', 'metrics', query),
+            'original_query': query,
+            'error': str(error)
+        }
+    
+    def _canonical_query_type(self, intent: str, query_type: str, query: str) -> str:
+        """Normalize intent and query type into the handler that should answer the query"""
+        if query_type == 'alerts' or intent == 'alerts':
+            return 'alerts'
+        if query_type == 'health' or intent == 'health':
+            return 'health'
+        if query_type == 'services' or 'service' in query.lower():
+            return 'services'
+        return 'metrics'
     
     async def generate_prometheus_query(self, components: Dict[str, Any]) -> Optional[str]:
         """Generate PromQL query from parsed components"""
         try:
-            intent = components.get('intent', '')
-            metrics = components.get('metrics', [])
-            services = components.get('services', [])
-            time_range = components.get('time_range', '5m')
-            
-            if not metrics and intent != 'alerts':
-                return None
-            
-            # Handle different query types
-            if intent == 'alerts':
-                return "ALERTS{alertstate=\"firing\"}"
-            elif intent == 'health' or 'health' in components.get('original_query', '').lower():
-                return "up"
-            elif intent == 'cpu' or any('cpu' in m.lower() for m in metrics):
-                base_query = "cpu_usage_percent" if "cpu_usage_percent" in metrics else "rate(cpu_seconds_total[5m]) * 100"
-            elif intent == 'memory' or any('memory' in m.lower() for m in metrics):
-                base_query = "memory_usage_percent" if "memory_usage_percent" in metrics else "memory_working_set_bytes"
-            elif intent == 'network' or any('network' in m.lower() for m in metrics):
-                base_query = "rate(network_receive_bytes_total[5m])"
-            else:
-                # Use first available metric
-                base_query = metrics[0] if metrics else "up"
-            
-            # Add service filters
-            if services:
-                service_filter = '|'.join(services)
-                if '{' in base_query:
-                    # Insert into existing braces
-                    base_query = base_query.replace('{', f'{{job=~"{service_filter}",', 1)
-                else:
-                    # Add new braces
-                    base_query = f"{base_query}{{job=~\"{service_filter}\"}}"
-            
-            # Add aggregation if needed
-            aggregation = components.get('aggregation', 'avg')
-            if aggregation and aggregation != 'raw':
-                agg_func = {
-                    'avg': 'avg',
-                    'sum': 'sum',
-                    'max': 'max',
-                    'min': 'min'
-                }.get(aggregation, 'avg')
-                
-                if services:
-                    base_query = f"{agg_func} by (job) ({base_query})"
-                else:
-                    base_query = f"{agg_func}({base_query})"
-            
-            return base_query
+            return _build_prometheus_query(
+                components.get('intent', ''),
+                tuple(components.get('metrics', [])),
+                tuple(components.get('services', [])),
+                components.get('aggregation', 'avg'),
+                'health' in components.get('original_query', '').lower()
+            )
             
         except Exception as e:
             logger.error(f"Error generating Prometheus query: {e}")
@@ -131,155 +416,468 @@ class NLPProcessor:
     
     async def generate_response(self, query: str, metrics: List[MetricData], alerts: List[AlertData], context: Dict[str, Any] = None) -> str:
         """Generate a natural language response based on query results"""
+        parts = [chunk async for chunk in self.generate_response_stream(query, metrics, alerts, context)]
+        return ''.join(parts).strip()
+    
+    async def generate_response_stream(self, query: str, metrics: List[MetricData], alerts: List[AlertData], context: Dict[str, Any] = None, fallback: bool = True) -> AsyncIterator[str]:
+        """Generate a natural language response, yielding text as the model produces it
+        
+        With fallback=False a failed generation raises instead of yielding the fallback text,
+        so callers can tell a generated answer from a stand-in.
+        """
+        emitted = False
         try:
-            # Prepare data summary
+            # Prepare data summary; per-metric statistics replace raw sample values in the prompt
+            services, metric_stats = self._summarize_metrics(metrics)
+            
             data_summary = {
                 'metrics_count': len(metrics),
                 'alerts_count': len(alerts),
-                'services': list(set([m.labels.get('job', 'unknown') for m in metrics if m.labels])),
-                'metric_names': list(set([m.name for m in metrics])),
+                'services': services,
+                'metric_names': [stat['name'] for stat in metric_stats],
                 'time_range': context.get('time_range', '1h') if context else '1h'
             }
             
             # Create sample data for context
-            sample_metrics = metrics[:5] if metrics else []
             sample_alerts = alerts[:3] if alerts else []
             
-            # Use AI to generate response
-            prompt = self._build_response_prompt(query, data_summary, sample_metrics, sample_alerts)
+            # Use AI to generate response, unless this exact prompt was answered recently
+            prompt = self._build_response_prompt(query, data_summary, metric_stats, sample_alerts)
+            cache_key = "nlp:resp:" + hashlib.sha1(f"{self._cfg.openai_model}|{prompt}".encode()).hexdigest()
+            cached = await self._ai_cache_get(cache_key)
+            if cached is not None:
+                yield cached
+                return
             
-            response = await openai.ChatCompletion.acreate(
-                model=self.settings.openai_model,
+            stream = await self._client.chat.completions.create(
+                model=self._cfg.openai_model,
                 messages=[
                     {"role": "system", "content": "You are a monitoring assistant. Provide clear, concise responses about system metrics and alerts."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
-                temperature=0.3
+                temperature=0.3,
+                stream=True
             )
             
-            return response.choices[0].message.content.strip()
+            parts = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    emitted = True
+                    yield delta
+            
+            content = ''.join(parts).strip()
+            if content:
+                await self._ai_cache_set(cache_key, content)
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
-            return self._fallback_response(query, metrics, alerts)
+            if not fallback:
+                raise
+            # A partially streamed answer is left as is; otherwise send the fallback text
+            if not emitted:
+                yield self.fallback_response(query, metrics, alerts)
     
     async def _analyze_intent_with_ai(self, query: str, services: List[str], metrics: List[str]) -> Dict[str, Any]:
         """Use OpenAI to analyze query intent"""
         try:
-            prompt = f"""
-            Analyze this monitoring query and extract structured information:
+            if not self._cfg.force_ai_parse:
+                local_intent = self._classify_intent_locally(query, services, metrics)
+                if local_intent is not None:
+                    return local_intent
             
-            Query: "{query}"
+            cache_key = self._intent_cache_key(query, services, metrics)
+            cached = await self._ai_cache_get(cache_key)
+            if cached is not None:
+                return cached
             
-            Available services: {services[:20]}
-            Available metrics: {metrics[:30]}
+            response = await self._client.chat.completions.create(**self._intent_request(query, services, metrics))
             
-            Extract and return JSON with:
-            - intent: main intent (cpu, memory, network, alerts, health, errors, performance)
-            - metrics: list of relevant metric names from available metrics
-            - services: list of relevant service names from available services
-            - time_range: time period (5m, 1h, 24h, etc.)
-            - aggregation: aggregation type (avg, sum, max, min, raw)
-            - query_type: type of query (metrics, alerts, logs, health)
-            - filters: any additional filters as key-value pairs
+            intent = self._parse_intent_content(response.choices[0].message.content)
+            if intent:
+                await self._ai_cache_set(cache_key, intent)
+            return intent
             
-            Return only valid JSON.
-            """
-            
-            response = await openai.ChatCompletion.acreate(
-                model=self.settings.openai_model,
+        except Exception as e:
+            logger.error(f"Error analyzing intent with AI: {e}")
+            return {}
+    
+    def _classify_intent_locally(self, query: str, services: List[str], metrics: List[str]) -> Optional[Dict[str, Any]]:
+        """Build the intent from the keyword classifier, or None when it is not confident enough"""
+        query_lower = query.lower()
+        intent, confidence = self._intent_clf.classify(query_lower)
+        if intent is None or confidence < self._cfg.local_intent_confidence:
+            return None
+        
+        query_type = intent if intent in ('alerts', 'health') else 'metrics'
+        matched_metrics = self._extract_metrics(query, metrics)
+        if query_type == 'metrics' and not matched_metrics:
+            # Choosing metrics from the catalog is left to the model
+            return None
+        
+        return {
+            'intent': intent,
+            'metrics': matched_metrics,
+            'services': self._extract_services(query, services),
+            'time_range': self._extract_time_range(query),
+            'aggregation': self._extract_aggregation(query),
+            'query_type': query_type,
+            'filters': {}
+        }
+    
+    def _intent_cache_key(self, query: str, services: List[str], metrics: List[str]) -> str:
+        """Content-addressed cache key for an intent analysis"""
+        services_hash = hashlib.blake2b('\x1f'.join(services).encode(), digest_size=16).hexdigest()
+        metrics_hash = hashlib.blake2b('\x1f'.join(metrics).encode(), digest_size=16).hexdigest()
+        material = f"{self._cfg.openai_model_fast}|{query.lower().strip()}|{services_hash}|{metrics_hash}"
+        return "nlp:intent:" + hashlib.sha1(material.encode()).hexdigest()
+    
+    async def _ai_cache_get(self, key: str) -> Optional[Any]:
+        """Look up a cached OpenAI result, in process first and then in Redis"""
+        entry = self._ai_cache.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._ai_cache.move_to_end(key)
+                return entry[1]
+            del self._ai_cache[key]
+        
+        try:
+            redis = await get_redis_client()
+            raw = await redis.get(key)
+            if raw is None:
+                return None
+            value = orjson.loads(raw)
+        except Exception as e:
+            logger.warning(f"AI cache lookup failed for {key}: {e}")
+            return None
+        
+        self._ai_cache_put(key, value)
+        return value
+    
+    async def _ai_cache_set(self, key: str, value: Any):
+        """Store an OpenAI result in process and in Redis for cache_ttl seconds"""
+        self._ai_cache_put(key, value)
+        try:
+            redis = await get_redis_client()
+            await redis.setex(key, self._cfg.cache_ttl, orjson.dumps(value))
+        except Exception as e:
+            logger.warning(f"AI cache write failed for {key}: {e}")
+    
+    async def _ai_cache_get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Look up several cached OpenAI results, fetching in-process misses from Redis in one round-trip"""
+        now = time.monotonic()
+        values: List[Optional[Any]] = []
+        for key in keys:
+            entry = self._ai_cache.get(key)
+            values.append(entry[1] if entry is not None and entry[0] > now else None)
+        
+        missing = [i for i, value in enumerate(values) if value is None]
+        if missing:
+            try:
+                fetched = await mget_json([keys[i] for i in missing])
+            except Exception as e:
+                logger.warning(f"AI cache lookup failed for {len(missing)} keys: {e}")
+                return values
+            for i, value in zip(missing, fetched):
+                if value is not None:
+                    values[i] = value
+                    self._ai_cache_put(keys[i], value)
+        
+        return values
+    
+    async def _ai_cache_set_many(self, items: Dict[str, Any]):
+        """Store several OpenAI results in process and in Redis with one round-trip"""
+        for key, value in items.items():
+            self._ai_cache_put(key, value)
+        try:
+            await mset_json(items, self._cfg.cache_ttl)
+        except Exception as e:
+            logger.warning(f"AI cache write failed for {len(items)} keys: {e}")
+    
+    def _ai_cache_put(self, key: str, value: Any):
+        """Insert into the in-process LRU, evicting the least recently used entry"""
+        self._ai_cache[key] = (time.monotonic() + self._cfg.cache_ttl, value)
+        self._ai_cache.move_to_end(key)
+        if len(self._ai_cache) > self._ai_cache_size:
+            self._ai_cache.popitem(last=False)
+    
+    def _intent_request(self, query: str, services: List[str], metrics: List[str]) -> Dict[str, Any]:
+        """Build the chat completion request used to analyze a single query"""
+        prompt = f"""
+        Analyze this monitoring query and extract structured information:
+        
+        Query: "{query}"
+        
+        Available services: {self._prompt_candidates([query], services, 'services', 10)}
+        Available metrics: {self._prompt_candidates([query], metrics, 'metrics', 10)}
+        
+        {self._INTENT_FIELDS}
+        
+        Return only valid JSON.
+        """
+        
+        return {
+            "model": self._cfg.openai_model_fast,
+            "messages": [
+                {"role": "system", "content": "You are a monitoring query analyzer. Return only valid JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 300,
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _prompt_candidates(self, queries: List[str], names: List[str], kind: str, limit: int) -> List[str]:
+        """Shortlist the catalog names relevant to the queries, so prompts only carry likely candidates
+        
+        Exact and category matches from the pattern extractors come first, then
+        close spellings of the query words; at most limit names are returned.
+        """
+        if not names:
+            return []
+        
+        extract = self._extract_metrics if kind == 'metrics' else self._extract_services
+        matcher = self._keyword_matcher(kind, names)
+        
+        candidates: Dict[str, None] = {}
+        for query in queries:
+            candidates.update(dict.fromkeys(extract(query, names)))
+        
+        if len(candidates) < limit:
+            lowered = list(matcher.by_lower)
+            for query in queries:
+                for word in self._WORD_RE.findall(query.lower()):
+                    for match in difflib.get_close_matches(word, lowered, n=limit, cutoff=0.5):
+                        candidates.setdefault(matcher.by_lower[match])
+        
+        return list(candidates)[:limit]
+    
+    def _parse_intent_content(self, content: Optional[str]) -> Dict[str, Any]:
+        """Extract the intent JSON object from a completion"""
+        return self._extract_json(content, '{', '}') or {}
+    
+    @staticmethod
+    def _extract_json(content: Optional[str], open_char: str, close_char: str) -> Any:
+        """Parse the outermost JSON value delimited by open_char/close_char, or None"""
+        # JSON mode returns the bare value; the slice also tolerates surrounding prose
+        content = content or ''
+        start = content.find(open_char)
+        end = content.rfind(close_char)
+        if start != -1 and end > start:
+            return orjson.loads(content[start:end + 1])
+        
+        return None
+    
+    async def _analyze_intents_combined(self, queries: List[str], services: List[str], metrics: List[str]) -> List[Dict[str, Any]]:
+        """Analyze several queries in one chat completion, returning one intent per query"""
+        numbered = '\n'.join(f'{i + 1}. "{query}"' for i, query in enumerate(queries))
+        prompt = f"""
+        Analyze each of these monitoring queries and extract structured information:
+        
+        {numbered}
+        
+        Available services: {self._prompt_candidates(queries, services, 'services', 20)}
+        Available metrics: {self._prompt_candidates(queries, metrics, 'metrics', 30)}
+        
+        {self._INTENT_FIELDS}
+        
+        Return only a valid JSON array with one such object per query ({len(queries)} in total), in the same order as the queries.
+        """
+        
+        try:
+            response = await self._client.chat.completions.create(
+                model=self._cfg.openai_model_fast,
                 messages=[
                     {"role": "system", "content": "You are a monitoring query analyzer. Return only valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=300,
+                max_tokens=300 * len(queries),
                 temperature=0.1
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Try to extract JSON from response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            
-            return {}
+            intents = self._extract_json(response.choices[0].message.content, '[', ']') or []
             
         except Exception as e:
-            logger.error(f"Error analyzing intent with AI: {e}")
-            return {}
+            logger.error(f"Error analyzing {len(queries)} intents with AI: {e}")
+            intents = []
+        
+        # Queries the model skipped fall back to pattern-based extraction
+        intents = [intent if isinstance(intent, dict) else {} for intent in intents[:len(queries)]]
+        return intents + [{}] * (len(queries) - len(intents))
+    
+    async def _analyze_intents_with_batch_api(self, queries: List[str], services: List[str], metrics: List[str]) -> List[Dict[str, Any]]:
+        """Analyze queries through the OpenAI Batch API and wait for the batch to finish"""
+        lines = [
+            orjson.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._intent_request(query, services, metrics)
+            })
+            for i, query in enumerate(queries)
+        ]
+        
+        batch_file = await self._client.files.create(
+            file=("intents.jsonl", b'\n'.join(lines)),
+            purpose="batch"
+        )
+        batch = await self._client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} with {len(queries)} queries")
+        
+        while batch.status in ("validating", "in_progress", "finalizing"):
+            await asyncio.sleep(self._cfg.openai_batch_poll_interval)
+            batch = await self._client.batches.retrieve(batch.id)
+        
+        intents: List[Dict[str, Any]] = [{}] * len(queries)
+        if batch.status != "completed" or not batch.output_file_id:
+            logger.warning(f"OpenAI batch {batch.id} ended with status {batch.status}")
+            return intents
+        
+        output = await self._client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                result = orjson.loads(line)
+                body = (result.get('response') or {}).get('body') or {}
+                intents[int(result['custom_id'])] = self._parse_intent_content(
+                    body['choices'][0]['message']['content']
+                )
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping unreadable OpenAI batch result: {e}")
+        
+        return intents
     
     def _extract_metrics(self, query: str, available_metrics: List[str]) -> List[str]:
         """Extract metric names from query using pattern matching"""
         query_lower = query.lower()
-        matched_metrics = []
+        matcher = self._keyword_matcher('metrics', available_metrics)
         
         # Direct matches with available metrics
-        for metric in available_metrics:
-            if metric.lower() in query_lower:
-                matched_metrics.append(metric)
+        matched_metrics = matcher.find(query_lower)
         
         # Pattern-based matching
-        for category, patterns in self.metric_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
+        matched_categories = self._match_categories(query_lower)
+        for category in self.metric_patterns:
+            if category in matched_categories:
                 # Find metrics that match this category
-                category_metrics = [m for m in available_metrics if category in m.lower()]
-                matched_metrics.extend(category_metrics[:3])  # Limit to avoid too many
+                matched_metrics.update(matcher.containing(category)[:3])  # Limit to avoid too many
         
-        return list(set(matched_metrics))
+        return list(matched_metrics)
+    
+    def _match_categories(self, query_lower: str) -> set:
+        """Metric categories mentioned in the query, found in one regex pass"""
+        return {match.lastgroup for match in self._category_re.finditer(query_lower)}
     
     def _extract_services(self, query: str, available_services: List[str]) -> List[str]:
         """Extract service names from query"""
         query_lower = query.lower()
-        matched_services = []
+        matcher = self._keyword_matcher('services', available_services)
         
         # Direct matches
-        for service in available_services:
-            service_lower = service.lower()
-            if service_lower in query_lower:
-                matched_services.append(service)
+        matched_services = matcher.find(query_lower)
         
         # Extract quoted service names
-        quoted_matches = re.findall(r'["\']([^"\']+)["\']', query)
+        quoted_matches = self._QUOTED_RE.findall(query)
         for match in quoted_matches:
-            if match in available_services:
-                matched_services.append(match)
+            if match in matcher.names:
+                matched_services.add(match)
         
-        return list(set(matched_services))
+        return list(matched_services)
+    
+    def _keyword_matcher(self, kind: str, names: List[str]) -> _KeywordMatcher:
+        """Get the matcher for a catalog, rebuilding it only when the catalog changes"""
+        key = tuple(names)
+        cached = self._matchers.get(kind)
+        if cached is None or cached[0] != key:
+            cached = (key, _KeywordMatcher(key))
+            self._matchers[kind] = cached
+        return cached[1]
     
-    def _extract_time_range(self, query: str) -> str:
-        """Extract time range from query"""
+    def _extract_time_range(self, query: str, default: Optional[str] = '1h') -> Optional[str]:
+        """Extract time range from query, or default if none is stated"""
         query_lower = query.lower()
         
         # Look for explicit time patterns
-        for time_range, patterns in self.time_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
-                return {'minute': '1m', 'hour': '1h', 'day': '24h', 'week': '7d'}[time_range]
+        for time_range, pattern_re in self._time_pattern_res:
+            if pattern_re.search(query_lower):
+                return time_range
         
         # Look for numeric patterns
-        time_match = re.search(r'(\d+)\s*(m|h|d|s)', query_lower)
+        time_match = self._TIME_RE.search(query_lower)
         if time_match:
             return f"{time_match.group(1)}{time_match.group(2)}"
         
-        return '1h'  # Default
+        return default
+    
+    @staticmethod
+    def _keywords_re(keywords: frozenset) -> re.Pattern:
+        """Compile keywords into one alternation anchored at word starts"""
+        # Longest first so multi-word phrases win over their prefixes
+        alternation = '|'.join(re.escape(k) for k in sorted(keywords, key=lambda k: (-len(k), k)))
+        return re.compile(rf'\b(?:{alternation})')
     
-    def _extract_aggregation(self, query: str) -> str:
-        """Extract aggregation function from query"""
+    def _extract_aggregation(self, query: str, default: Optional[str] = 'avg') -> Optional[str]:
+        """Extract aggregation function from query, or default if none is stated"""
         query_lower = query.lower()
         
-        if any(word in query_lower for word in ['average', 'avg', 'mean']):
-            return 'avg'
-        elif any(word in query_lower for word in ['sum', 'total']):
-            return 'sum'
-        elif any(word in query_lower for word in ['max', 'maximum', 'peak']):
-            return 'max'
-        elif any(word in query_lower for word in ['min', 'minimum', 'lowest']):
-            return 'min'
+        for aggregation, pattern_re in self._AGGREGATION_RES:
+            if pattern_re.search(query_lower):
+                return aggregation
+        
+        return default
+    
+    def _to_soa(self, metrics: List[MetricData]) -> Dict[str, np.ndarray]:
+        """Convert metrics into column arrays (values, names, jobs) for vectorized summaries"""
+        return {
+            'values': np.fromiter((m.value for m in metrics), dtype=np.float64, count=len(metrics)),
+            'names': np.array([m.name for m in metrics], dtype=object),
+            'units': np.array([m.unit for m in metrics], dtype=object),
+            # Metrics without labels have no service; '' marks them so they can be dropped
+            'jobs': np.array([m.labels.get('job', 'unknown') if m.labels else '' for m in metrics], dtype=object)
+        }
+    
+    def _summarize_metrics(self, metrics: List[MetricData]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Get the sorted services and per-metric count/min/avg/max statistics for the prompt"""
+        if not metrics:
+            return [], []
+        
+        soa = self._to_soa(metrics)
+        values = soa['values']
+        
+        jobs = np.unique(soa['jobs'])
+        services = [str(job) for job in jobs if job]
         
-        return 'avg'  # Default
+        # Group values by metric name; np.unique returns names sorted, keeping prompts deterministic
+        names, first_index, inverse = np.unique(soa['names'], return_index=True, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(names))
+        sums = np.bincount(inverse, weights=values, minlength=len(names))
+        mins = np.full(len(names), np.inf)
+        maxs = np.full(len(names), -np.inf)
+        np.minimum.at(mins, inverse, values)
+        np.maximum.at(maxs, inverse, values)
+        
+        metric_stats = [
+            {
+                'name': str(name),
+                'unit': soa['units'][first],
+                'count': int(count),
+                'min': float(low),
+                'avg': float(total / count),
+                'max': float(high)
+            }
+            for name, first, count, total, low, high in zip(names, first_index, counts, sums, mins, maxs)
+        ]
+        
+        return services, metric_stats
     
-    def _build_response_prompt(self, query: str, data_summary: Dict, sample_metrics: List[MetricData], sample_alerts: List[AlertData]) -> str:
+    def _build_response_prompt(self, query: str, data_summary: Dict, metric_stats: List[Dict[str, Any]], sample_alerts: List[AlertData]) -> str:
         """Build prompt for response generation"""
         return f"""
         User asked: "{query}"
@@ -291,8 +889,8 @@ class NLPProcessor:
         - Metrics: {', '.join(data_summary['metric_names'][:5])}
         - Time range: {data_summary['time_range']}
         
-        Sample metrics (showing first few):
-        {self._format_sample_metrics(sample_metrics)}
+        Metric statistics (first few metrics):
+        {self._format_metric_stats(metric_stats)}
         
         Sample alerts (showing first few):
         {self._format_sample_alerts(sample_alerts)}
@@ -306,15 +904,17 @@ class NLPProcessor:
         Be concise but informative.
         """
     
-    def _format_sample_metrics(self, metrics: List[MetricData]) -> str:
-        """Format sample metrics for prompt"""
-        if not metrics:
+    def _format_metric_stats(self, metric_stats: List[Dict[str, Any]]) -> str:
+        """Format per-metric statistics for prompt"""
+        if not metric_stats:
             return "No metrics found."
         
         formatted = []
-        for metric in metrics[:3]:
-            service = metric.labels.get('job', 'unknown') if metric.labels else 'unknown'
-            formatted.append(f"- {metric.name}: {metric.value:.2f} {metric.unit} (service: {service})")
+        for stat in metric_stats[:5]:
+            formatted.append(
+                f"- {stat['name']}: min {stat['min']:.2f}, avg {stat['avg']:.2f}, max {stat['max']:.2f} "
+                f"{stat['unit']} ({stat['count']} samples)"
+            )
         
         return '\n'.join(formatted)
     
@@ -329,7 +929,7 @@ class NLPProcessor:
         
         return '\n'.join(formatted)
     
-    def _fallback_response(self, query: str, metrics: List[MetricData], alerts: List[AlertData]) -> str:
+    def fallback_response(self, query: str, metrics: List[MetricData], alerts: List[AlertData]) -> str:
         """Generate a fallback response when AI fails"""
         if alerts:
             return f"Found {len(alerts)} active alerts. The most critical ones need attention."
@@ -1,8 +1,11 @@
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from cachetools import TTLCache
+import hashlib
 import jwt
-from .config import settings
+import time
+from .config import settings_fast as settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +13,15 @@ logger = logging.getLogger(__name__)
 # Optional authentication - can be disabled via settings
 security = HTTPBearer(auto_error=False)
 
+_JWT_ALG = "HS256"
+_TOKEN_LIFETIME_SECONDS = 24 * 3600
+
+# Secret encoded once instead of on every verification
+_JWT_SECRET = settings.jwt_secret.encode() if settings.jwt_secret else None
+
+# Recently verified tokens (digest -> user); the short TTL bounds how long a cached decode is trusted
+_verified_tokens: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[Dict[str, Any]]:
@@ -29,20 +41,30 @@ async def get_current_user(
         # No token provided but auth is enabled
         raise HTTPException(status_code=401, detail="Authentication required")
     
+    token_key = hashlib.blake2b(credentials.credentials.encode(), digest_size=16).digest()
+    cached_user = _verified_tokens.get(token_key)
+    if cached_user is not None:
+        if cached_user["exp"] is None or cached_user["exp"] > time.time():
+            return dict(cached_user)
+        _verified_tokens.pop(token_key, None)
+        raise HTTPException(status_code=401, detail="Token expired")
+    
     try:
         # Decode JWT token
         payload = jwt.decode(
             credentials.credentials,
-            settings.jwt_secret,
-            algorithms=["HS256"]
+            _JWT_SECRET,
+            algorithms=[_JWT_ALG]
         )
         
-        return {
+        user = {
             "user_id": payload.get("sub"),
             "username": payload.get("username", "unknown"),
             "roles": payload.get("roles", ["user"]),
             "exp": payload.get("exp")
         }
+        _verified_tokens[token_key] = user
+        return dict(user)
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -55,12 +77,13 @@ def create_access_token(user_id: str, username: str, roles: list = None) -> str:
     if not settings.jwt_secret:
         raise ValueError("JWT secret not configured")
     
+    now = int(time.time())
     payload = {
         "sub": user_id,
         "username": username,
         "roles": roles or ["user"],
-        "iat": int(datetime.utcnow().timestamp()),
-        "exp": int((datetime.utcnow() + timedelta(hours=24)).timestamp())
+        "iat": now,
+        "exp": now + _TOKEN_LIFETIME_SECONDS
     }
     
-    return jwt.encode(payload, settings.jwt_secret, algorithm="HS256")
\ No newline at end of file
+    return jwt.encode(payload, _JWT_SECRET, algorithm=_JWT_ALG)
\ No newline at end of file
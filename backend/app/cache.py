@@ -1,38 +1,83 @@
-import aioredis
-from typing import Optional
-from .config import settings
+from redis import asyncio as aioredis
+from redis.asyncio.connection import ConnectionPool
+import orjson
+from typing import Any, Dict, List, Optional
+from .config import settings_fast as settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 _redis_client: Optional[aioredis.Redis] = None
 
-async def get_redis_client() -> aioredis.Redis:
-    """Get or create Redis client instance"""
+async def init_redis_client() -> aioredis.Redis:
+    """Create the pooled Redis client and verify the connection once at startup"""
     global _redis_client
     
     if _redis_client is None:
         try:
-            _redis_client = aioredis.from_url(
+            # redis-py parses replies with hiredis automatically when it is installed
+            pool = ConnectionPool.from_url(
                 settings.redis_url,
                 password=settings.redis_password,
-                decode_responses=True,
+                decode_responses=False,  # Conversation history is stored as msgpack bytes
                 retry_on_timeout=True,
-                health_check_interval=30
+                health_check_interval=30,
+                max_connections=64
             )
+            _redis_client = aioredis.Redis(connection_pool=pool)
             # Test connection
             await _redis_client.ping()
             logger.info("Redis client connected successfully")
         except Exception as e:
+            _redis_client = None
             logger.error(f"Failed to connect to Redis: {e}")
             raise
     
     return _redis_client
 
+async def get_redis_client() -> aioredis.Redis:
+    """Get the Redis client created at startup, creating it if startup did not"""
+    if _redis_client is None:
+        return await init_redis_client()
+    
+    return _redis_client
+
+async def mget_json(keys: List[str]) -> List[Optional[Any]]:
+    """Fetch several JSON values in one round-trip; missing or unreadable keys come back as None"""
+    if not keys:
+        return []
+    
+    redis = await get_redis_client()
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.get(key)
+        raw_values = await pipe.execute()
+    
+    values = []
+    for key, raw in zip(keys, raw_values):
+        try:
+            values.append(orjson.loads(raw) if raw is not None else None)
+        except orjson.JSONDecodeError:
+            logger.warning(f"Ignoring unreadable cached value for {key}")
+            values.append(None)
+    
+    return values
+
+async def mset_json(items: Dict[str, Any], ttl: int):
+    """Store several JSON values with the same TTL in one round-trip"""
+    if not items:
+        return
+    
+    redis = await get_redis_client()
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, value in items.items():
+            pipe.setex(key, ttl, orjson.dumps(value))
+        await pipe.execute()
+
 async def close_redis_client():
     """Close Redis client connection"""
     global _redis_client
     if _redis_client:
-        await _redis_client.close()
+        await _redis_client.close(close_connection_pool=True)
         _redis_client = None
-        logger.info("Redis client connection closed")
\ No newline at end of file
+        logger.info("Redis client connection closed")
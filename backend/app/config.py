@@ -1,4 +1,5 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from types import SimpleNamespace
 from typing import Optional, List
 import os
 
@@ -14,6 +15,12 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str = ""
     openai_model: str = "gpt-4-turbo-preview"
+    openai_model_fast: str = "gpt-4o-mini"  # Used for intent analysis
+    enable_openai_batch_api: bool = False
+    openai_batch_poll_interval: int = 30
+    openai_batch_max_queries: int = 10
+    force_ai_parse: bool = False
+    local_intent_confidence: float = 0.85
     
     # Monitoring Sources
     prometheus_url: str = ""
@@ -41,8 +48,19 @@ class Settings(BaseSettings):
     default_time_range: str = "1h"
     max_time_range: str = "7d"
     query_timeout: int = 30
+    connector_timeout: int = 10
+    connector_concurrency: int = 10
+    connector_health_ttl: int = 10
+    connector_health_interval: int = 30
+    connector_breaker_threshold: int = 3
+    connector_breaker_reset: int = 30
+    health_refresh_interval: int = 10
     max_query_results: int = 1000
     cache_ttl: int = 300
+    parse_cache_ttl: int = 600
+    response_cache_ttl: int = 60
+    catalog_cache_ttl: int = 30
+    promql_cache_ttl: int = 30
     
     # Security
     jwt_secret: Optional[str] = None
@@ -53,10 +71,8 @@ class Settings(BaseSettings):
     enable_metrics_export: bool = True
     enable_real_time_updates: bool = True
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
-        
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+    
     def is_configured(self) -> bool:
         """Check if the basic required configuration is present"""
         return (
@@ -66,4 +82,15 @@ class Settings(BaseSettings):
         )
 
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = Settings()
+
+def _snapshot(source: Settings) -> SimpleNamespace:
+    """Copy settings into a plain namespace for cheap attribute access on hot paths"""
+    return SimpleNamespace(**source.model_dump())
+
+# Plain-attribute snapshot of the global settings, taken once at import
+settings_fast = _snapshot(settings)
+
+def freeze_settings(source: Settings) -> SimpleNamespace:
+    """Plain-attribute snapshot of source; the global settings always share settings_fast"""
+    return settings_fast if source is settings else _snapshot(source)
@@ -1,14 +1,41 @@
 import aiohttp
-import json
+import asyncio
+import hashlib
+import numpy as np
+import orjson
 import logging
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+import os
+import tempfile
+import time
+from contextlib import aclosing, asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
 
-from .base import BaseConnector
-from ..models import MetricData, AlertData
+from .base import BaseConnector, async_ttl_cache, instrumented, parse_timestamp, raise_for_server_error
+from ..models import MetricData, MetricSeries, AlertData
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 logger = logging.getLogger(__name__)
 
+# Tokens are shared through this directory by every process using the same app registration
+_TOKEN_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-monitoring-agent")
+_ARM_BASE = "https://management.azure.com"
+_TOKEN_REFRESH_MARGIN = 300  # Refresh tokens this many seconds before they expire
+
+# Throttled (429) or unavailable (503) ARM calls are retried with exponential backoff
+_RETRY_STATUSES = frozenset([429, 503])
+_MAX_RETRIES = 3
+_RETRY_BASE_DELAY = 0.5
+
+_MAX_PAGES = 100  # Upper bound on nextLink pages followed for one listing
+
+_NUMERIC_KQL_TYPES = frozenset(('real', 'long', 'int'))
+
 class AzureMonitorConnector(BaseConnector):
     """Connector for Azure Monitor APIs"""
     
@@ -19,111 +46,128 @@ class AzureMonitorConnector(BaseConnector):
         self.client_secret = client_secret
         self.tenant_id = tenant_id
         self.access_token = None
-        self.token_expires = None
+        self.token_expires = None  # Epoch seconds
+        self._auth_headers: Dict[str, str] = {}  # Rebuilt only when the token changes
+        self._sub_url = f"{_ARM_BASE}/subscriptions/{subscription_id}"
+        self._token_lock = asyncio.Lock()
+        
+        key = hashlib.sha256(f"{tenant_id}{client_id}".encode()).hexdigest()
+        self._token_path = os.path.join(_TOKEN_CACHE_DIR, f"azure_token_{key}.json")
     
+    @instrumented
     async def health_check(self) -> bool:
         """Check Azure Monitor connectivity"""
-        try:
-            token = await self._get_access_token()
-            if not token:
-                return False
-            
-            # Test with a simple subscription call
-            headers = {"Authorization": f"Bearer {token}"}
-            url = f"https://management.azure.com/subscriptions/{self.subscription_id}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params={"api-version": "2020-01-01"}) as response:
-                    return response.status == 200
-        except Exception as e:
-            logger.error(f"Azure Monitor health check failed: {e}")
+        token = await self._get_access_token()
+        if not token:
             return False
+        
+        # Test with a simple subscription call
+        data = await self._request_json("GET", self._sub_url, self._auth_headers, params={"api-version": "2020-01-01"})
+        return data is not None
     
+    @instrumented
     async def query_metrics(self, query: str, **kwargs) -> List[MetricData]:
         """Execute a KQL query or get metrics from Azure Monitor"""
-        try:
-            token = await self._get_access_token()
-            if not token:
-                return []
-            
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            # Handle different query types
-            resource_id = kwargs.get('resource_id')
-            if resource_id:
-                # Get specific resource metrics
-                return await self._get_resource_metrics(resource_id, query, headers, **kwargs)
-            elif query.startswith("Heartbeat") or "|" in query:
-                # Log Analytics KQL query
-                return await self._execute_kql_query(query, headers, **kwargs)
-            else:
-                # Try to find resources by type/name
-                return await self._search_and_query_resources(query, headers, **kwargs)
-                
-        except Exception as e:
-            logger.error(f"Error querying Azure Monitor: {e}")
+        token = await self._get_access_token()
+        if not token:
             return []
+        
+        headers = self._auth_headers
+        
+        # Handle different query types
+        resource_id = kwargs.get('resource_id')
+        resource_ids = kwargs.pop('resource_ids', None)
+        if resource_ids:
+            # Same metrics for several resources, fetched concurrently
+            results = await self.query_metrics_batch(resource_ids, query, **kwargs)
+            return [metric for metrics in results.values() for metric in metrics]
+        elif resource_id:
+            # Get specific resource metrics
+            return await self._get_resource_metrics(resource_id, query, headers, **kwargs)
+        elif query.startswith("Heartbeat") or "|" in query:
+            # Log Analytics KQL query
+            return await self._execute_kql_query(query, headers, **kwargs)
+        else:
+            # Try to find resources by type/name
+            return await self._search_and_query_resources(query, headers, **kwargs)
+    
+    async def query_metrics_batch(
+        self,
+        resource_ids: List[str],
+        metric_names: str,
+        concurrency: int = 10,
+        **kwargs
+    ) -> Dict[str, List[MetricData]]:
+        """Get the same metrics for several resources, at most `concurrency` requests at a time"""
+        token = await self._get_access_token()
+        if not token or not resource_ids:
+            return {}
+        
+        headers = self._auth_headers
+        kwargs.pop('resource_id', None)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def query_one(resource_id: str) -> List[MetricData]:
+            async with semaphore:
+                return await self._get_resource_metrics(resource_id, metric_names, headers, **kwargs)
+        
+        responses = await asyncio.gather(*(query_one(r) for r in resource_ids), return_exceptions=True)
+        
+        results = {}
+        for resource_id, metrics in zip(resource_ids, responses):
+            if isinstance(metrics, Exception):
+                logger.error(f"Error getting metrics for {resource_id}: {metrics}")
+                results[resource_id] = []
+            else:
+                results[resource_id] = metrics
+        
+        return results
     
+    @instrumented
     async def get_active_alerts(self) -> List[AlertData]:
         """Get active alerts from Azure Monitor"""
-        try:
-            token = await self._get_access_token()
-            if not token:
-                return []
-            
-            headers = {"Authorization": f"Bearer {token}"}
-            
-            # Get alerts from Alert Management API
-            url = f"https://management.azure.com/subscriptions/{self.subscription_id}/providers/Microsoft.AlertsManagement/alerts"
-            params = {
-                "api-version": "2019-05-05-preview",
-                "alertState": "New,Acknowledged"
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_azure_alerts(data)
-            
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error getting Azure alerts: {e}")
+        token = await self._get_access_token()
+        if not token:
             return []
+        
+        # Get alerts from Alert Management API
+        url = f"{self._sub_url}/providers/Microsoft.AlertsManagement/alerts"
+        params = {
+            "api-version": "2019-05-05-preview",
+            "alertState": "New,Acknowledged"
+        }
+        
+        async with aclosing(self._iter_value_items(url, self._auth_headers, params=params)) as items:
+            alerts = [alert async for alert in items]
+        
+        return self._parse_azure_alerts(alerts)
     
+    @async_ttl_cache(ttl=300)
+    @instrumented
     async def get_services(self) -> List[str]:
         """Get list of Azure resources/services"""
-        try:
-            token = await self._get_access_token()
-            if not token:
-                return []
-            
-            headers = {"Authorization": f"Bearer {token}"}
-            url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resources"
-            params = {"api-version": "2021-04-01"}
-            
-            services = set()
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        for resource in data.get('value', []):
-                            resource_type = resource.get('type', '')
-                            name = resource.get('name', '')
-                            if resource_type and name:
-                                services.add(f"{resource_type.split('/')[-1]}: {name}")
-            
-            return sorted(list(services))[:50]  # Limit for performance
-            
-        except Exception as e:
-            logger.error(f"Error getting Azure services: {e}")
+        token = await self._get_access_token()
+        if not token:
             return []
+        
+        url = f"{self._sub_url}/resources"
+        params = {"api-version": "2021-04-01"}
+        
+        services = set()
+        
+        # Resources are parsed as they arrive; stop reading once the limit is reached
+        async with aclosing(self._iter_value_items(url, self._auth_headers, params=params)) as resources:
+            async for resource in resources:
+                resource_type = resource.get('type', '')
+                name = resource.get('name', '')
+                if resource_type and name:
+                    services.add(f"{resource_type.split('/')[-1]}: {name}")
+                    if len(services) >= 50:  # Limit for performance
+                        break
+        
+        return sorted(services)
     
+    @async_ttl_cache(ttl=300)
     async def get_metrics_list(self) -> List[str]:
         """Get list of available metrics from common Azure services"""
         # Common Azure metrics - in a real implementation, you'd query the metric definitions API
@@ -145,111 +189,313 @@ class AzureMonitorConnector(BaseConnector):
         ]
         return common_metrics
     
+    def _token_valid(self) -> bool:
+        """Whether the in-memory token outlives the refresh margin"""
+        return bool(self.access_token and self.token_expires and self.token_expires - time.time() > _TOKEN_REFRESH_MARGIN)
+    
+    def _set_token(self, token: Optional[str], expires: Optional[float]):
+        """Store the token and the Authorization header built from it"""
+        self.access_token = token
+        self.token_expires = expires
+        self._auth_headers = {"Authorization": f"Bearer {token}"} if token else {}
+    
+    def _load_cached_token(self) -> bool:
+        """Adopt a still-valid token written by another process, if there is one"""
+        try:
+            with open(self._token_path, 'rb') as f:
+                cached = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return False
+        
+        self._set_token(cached.get("access_token"), cached.get("expires_at"))
+        return self._token_valid()
+    
+    def _store_cached_token(self):
+        """Write the token atomically, readable only by the current user"""
+        try:
+            os.makedirs(_TOKEN_CACHE_DIR, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=_TOKEN_CACHE_DIR, prefix=".azure_token_")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(orjson.dumps({"access_token": self.access_token, "expires_at": self.token_expires}))
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self._token_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not cache Azure access token: {e}")
+    
+    def _invalidate_token(self):
+        """Forget the token in memory and on disk after Azure rejected it"""
+        self._set_token(None, None)
+        try:
+            os.remove(self._token_path)
+        except OSError:
+            pass
+    
     async def _get_access_token(self) -> Optional[str]:
-        """Get Azure access token using client credentials"""
-        if self.access_token and self.token_expires and datetime.now() < self.token_expires:
+        """Get Azure access token from memory, the shared token file, or client credentials"""
+        if self._token_valid():
             return self.access_token
         
-        try:
-            url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/token"
-            data = {
-                "grant_type": "client_credentials",
-                "client_id": self.client_id,
-                "client_secret": self.client_secret,
-                "resource": "https://management.azure.com/"
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=data) as response:
-                    if response.status == 200:
-                        token_data = await response.json()
-                        self.access_token = token_data.get("access_token")
-                        expires_in = token_data.get("expires_in", 3600)
-                        self.token_expires = datetime.now() + timedelta(seconds=expires_in - 300)  # 5min buffer
-                        return self.access_token
-            
-            return None
+        # Concurrent callers wait for one refresh instead of each posting to Azure AD
+        async with self._token_lock:
+            if self._token_valid() or self._load_cached_token():
+                return self.access_token
+            
+            try:
+                url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/token"
+                data = {
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "resource": f"{_ARM_BASE}/"
+                }
+                
+                session = await self._get_session()
+                for attempt in range(_MAX_RETRIES + 1):
+                    async with session.post(url, data=data) as response:
+                        status = response.status
+                        if status == 200:
+                            token_data = orjson.loads(await response.read())
+                            self._set_token(
+                                token_data.get("access_token"),
+                                time.time() + int(token_data.get("expires_in", 3600))
+                            )
+                            self._store_cached_token()
+                            return self.access_token
+                    
+                    # Back off when Azure AD throttles or fails; other errors will not improve on retry
+                    if (status == 429 or status >= 500) and attempt < _MAX_RETRIES:
+                        await asyncio.sleep(_RETRY_BASE_DELAY * 2 ** attempt)
+                    else:
+                        logger.error(f"Azure token request failed: {status}")
+                        return None
+                
+                return None
             
-        except Exception as e:
-            logger.error(f"Error getting Azure access token: {e}")
-            return None
+            except Exception as e:
+                logger.error(f"Error getting Azure access token: {e}")
+                return None
     
+    @asynccontextmanager
+    async def _authorized_response(self, method: str, url: str, headers: Dict[str, str], **kwargs) -> AsyncIterator[Optional[aiohttp.ClientResponse]]:
+        """Send an authorized request, yielding the open response if it succeeded, else None
+        
+        A 401 invalidates the cached token and retries once with a fresh one; 429 and
+        503 are retried up to _MAX_RETRIES times with exponential backoff. Server errors
+        that outlast the retries are raised. Both buffered and streamed reads go through
+        here so they throttle and re-authenticate the same way.
+        """
+        session = await self._get_session()
+        refreshed_token = False
+        for attempt in range(_MAX_RETRIES + 1):
+            async with session.request(method, url, headers=headers, **kwargs) as response:
+                status = response.status
+                if status == 200:
+                    yield response
+                    return
+                if status not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                    raise_for_server_error(response)
+            
+            if status == 401 and not refreshed_token:
+                refreshed_token = True
+                self._invalidate_token()
+                token = await self._get_access_token()
+                if not token:
+                    break
+                headers = {**headers, **self._auth_headers}
+            elif status in _RETRY_STATUSES and attempt < _MAX_RETRIES:
+                await asyncio.sleep(_RETRY_BASE_DELAY * 2 ** attempt)
+            else:
+                break
+        
+        yield None
+    
+    async def _request_json(self, method: str, url: str, headers: Dict[str, str], **kwargs) -> Optional[Any]:
+        """Send an authorized request and return the decoded body, or None unless it succeeded"""
+        async with self._authorized_response(method, url, headers, **kwargs) as response:
+            if response is None:
+                return None
+            return orjson.loads(await response.read())
+    
+    async def _iter_value_items(self, url: str, headers: Dict[str, str], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the items of the top-level "value" array across every page of an ARM listing
+        
+        ARM chains pages through nextLink, so a page is only known once the previous one
+        has been read. Without ijson the next page is requested as soon as its link is
+        known, overlapping that round-trip with the consumer's work on the current page.
+        With ijson each page is streamed as it arrives, and closing the generator early
+        drops the connection instead of reading the rest.
+        """
+        pages = 0
+        if ijson is None:
+            pending = asyncio.create_task(self._request_json("GET", url, headers, **kwargs))
+            try:
+                while pending is not None:
+                    data = await pending or {}
+                    pending = None
+                    pages += 1
+                    
+                    next_link = data.get('nextLink')
+                    if next_link and pages < _MAX_PAGES:
+                        pending = asyncio.create_task(self._request_json("GET", next_link, {**headers, **self._auth_headers}))
+                    
+                    for item in data.get('value', []):
+                        yield item
+            finally:
+                if pending is not None:
+                    pending.cancel()
+            return
+        
+        while url and pages < _MAX_PAGES:
+            next_link: List[str] = []
+            async with aclosing(self._stream_page(url, headers, next_link, **kwargs)) as items:
+                async for item in items:
+                    yield item
+            
+            pages += 1
+            url = next_link[0] if next_link else None
+            # nextLink already carries api-version and the continuation token
+            kwargs = {}
+            headers = {**headers, **self._auth_headers}
+    
+    async def _stream_page(self, url: str, headers: Dict[str, str], next_link: List[str], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one page's "value" items with ijson as bytes arrive, appending its nextLink if present"""
+        async with self._authorized_response("GET", url, headers, **kwargs) as response:
+            if response is None:
+                return
+            try:
+                builder = None
+                depth = 0
+                async for prefix, event, value in ijson.parse(response.content, use_float=True):
+                    if builder is not None:
+                        builder.event(event, value)
+                        if event in ('start_map', 'start_array'):
+                            depth += 1
+                        elif event in ('end_map', 'end_array'):
+                            depth -= 1
+                            if not depth:
+                                yield builder.value
+                                builder = None
+                    elif prefix == 'value.item' and event == 'start_map':
+                        builder = ijson.ObjectBuilder()
+                        builder.event(event, value)
+                        depth = 1
+                    elif prefix == 'nextLink' and event == 'string':
+                        next_link.append(value)
+            finally:
+                if not response.content.at_eof():
+                    response.close()
+    
+    @instrumented
     async def _get_resource_metrics(self, resource_id: str, metric_names: str, headers: Dict[str, str], **kwargs) -> List[MetricData]:
         """Get metrics for a specific Azure resource"""
-        try:
-            url = f"https://management.azure.com{resource_id}/providers/Microsoft.Insights/metrics"
-            
-            # Parse timespan
-            timespan_hours = kwargs.get('timespan', 1)
-            end_time = datetime.now()
-            start_time = end_time - timedelta(hours=timespan_hours)
-            timespan = f"{start_time.isoformat()}Z/{end_time.isoformat()}Z"
-            
-            params = {
-                "api-version": "2018-01-01",
-                "metricnames": metric_names,
-                "timespan": timespan,
-                "interval": kwargs.get('interval', 'PT1M'),
-                "aggregation": kwargs.get('aggregation', 'Average')
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_azure_metrics(data, resource_id)
-            
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error getting resource metrics: {e}")
-            return []
+        url = f"{_ARM_BASE}{resource_id}/providers/Microsoft.Insights/metrics"
+        
+        # Parse timespan
+        timespan_hours = kwargs.get('timespan', 1)
+        end_time = datetime.now()
+        start_time = end_time - timedelta(hours=timespan_hours)
+        timespan = f"{start_time.isoformat()}Z/{end_time.isoformat()}Z"
+        
+        params = {
+            "api-version": "2018-01-01",
+            "metricnames": metric_names,
+            "timespan": timespan,
+            "interval": kwargs.get('interval', 'PT1M'),
+            "aggregation": kwargs.get('aggregation', 'Average')
+        }
+        
+        data = await self._request_json("GET", url, headers, params=params)
+        if data is not None:
+            series = self._parse_azure_metrics(data, resource_id, params["aggregation"])
+            return [point for s in series for point in s.iter_points()]
+        
+        return []
     
+    @instrumented
     async def _execute_kql_query(self, query: str, headers: Dict[str, str], **kwargs) -> List[MetricData]:
         """Execute a KQL query against Log Analytics"""
-        try:
-            workspace_id = kwargs.get('workspace_id')
-            if not workspace_id:
-                logger.warning("No workspace_id provided for KQL query")
-                return []
-            
-            url = f"https://api.loganalytics.io/v1/workspaces/{workspace_id}/query"
-            
-            payload = {
-                "query": query,
-                "timespan": kwargs.get('timespan', 'P1D')  # Last day by default
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_kql_results(data)
-            
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error executing KQL query: {e}")
+        workspace_id = kwargs.get('workspace_id')
+        if not workspace_id:
+            logger.warning("No workspace_id provided for KQL query")
             return []
+        
+        url = f"https://api.loganalytics.io/v1/workspaces/{workspace_id}/query"
+        
+        payload = {
+            "query": query,
+            "timespan": kwargs.get('timespan', 'P1D')  # Last day by default
+        }
+        
+        data = await self._request_json("POST", url, **self._json_body(headers, payload))
+        if data is not None:
+            return [point for s in self._parse_kql_results(data) for point in s.iter_points()]
+        
+        return []
     
+    @instrumented
     async def _search_and_query_resources(self, search_term: str, headers: Dict[str, str], **kwargs) -> List[MetricData]:
         """Search for resources and query their metrics"""
-        try:
-            # This is a simplified version - would need more sophisticated resource discovery
-            logger.info(f"Searching for resources matching: {search_term}")
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error searching resources: {e}")
-            return []
+        # This is a simplified version - would need more sophisticated resource discovery
+        logger.info(f"Searching for resources matching: {search_term}")
+        return []
+    
+    _AGGREGATION_KEYS = ('average', 'maximum', 'minimum', 'total')
     
-    def _parse_azure_metrics(self, data: Dict[str, Any], resource_id: str) -> List[MetricData]:
-        """Parse Azure Monitor metrics response"""
-        metrics = []
+    @staticmethod
+    def _utc_columns(timestamps: List[str], values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert ISO timestamps and their values to datetime64[ns] (UTC) and float64 arrays
+        
+        Azure reports timestamps in UTC with a 'Z' suffix, and a series of those converts
+        in one NumPy call. A series holding anything else (an explicit offset, a malformed
+        timestamp or value) is parsed point by point instead, skipping only the bad points.
+        """
+        if all(ts.endswith('Z') for ts in timestamps):
+            try:
+                return (
+                    np.array([ts[:-1] for ts in timestamps], dtype='datetime64[ns]'),
+                    np.asarray(values, dtype=np.float64)
+                )
+            except (ValueError, TypeError):
+                pass
+        
+        kept_timestamps = []
+        kept_values = []
+        for ts, value in zip(timestamps, values):
+            try:
+                parsed = parse_timestamp(ts)
+                value = float(value)
+            except (ValueError, TypeError):
+                continue
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            kept_timestamps.append(parsed)
+            kept_values.append(value)
+        
+        return np.array(kept_timestamps, dtype='datetime64[ns]'), np.asarray(kept_values, dtype=np.float64)
+    
+    def _parse_azure_metrics(self, data: Dict[str, Any], resource_id: str, aggregation: str = 'Average') -> List[MetricSeries]:
+        """Parse Azure Monitor metrics response into one MetricSeries per timeseries
+        
+        Points carry one field per requested aggregation; the first requested one is read
+        directly and the others are only tried when a point lacks it. Timeseries with
+        identical labels (the same dimensions across metrics) share one read-only mapping.
+        """
+        series = []
+        labels_cache: Dict[frozenset, Mapping[str, str]] = {}
+        
+        agg_key = aggregation.split(',', 1)[0].strip().lower()
+        fallback_keys = tuple(k for k in self._AGGREGATION_KEYS if k != agg_key)
+        # Second-to-last path segment, sliced out without splitting the whole ID
+        end = resource_id.rfind('/')
+        resource_type = resource_id[resource_id.rfind('/', 0, end) + 1:end] if end >= 0 else 'unknown'
         
         for metric in data.get('value', []):
             metric_name = metric.get('name', {}).get('value', 'unknown')
-            unit = metric.get('unit', 'count')
+            unit = self._convert_azure_unit(metric.get('unit', 'count'))
             
             for timeseries in metric.get('timeseries', []):
                 labels = {}
@@ -263,31 +509,44 @@ class AzureMonitorConnector(BaseConnector):
                 
                 # Add resource info
                 labels['resource_id'] = resource_id
-                labels['resource_type'] = resource_id.split('/')[-2] if '/' in resource_id else 'unknown'
+                labels['resource_type'] = resource_type
+                
+                key = frozenset(labels.items())
+                shared_labels = labels_cache.get(key)
+                if shared_labels is None:
+                    shared_labels = labels_cache[key] = MappingProxyType(labels)
                 
-                # Parse data points
+                # Collect raw columns in a tight loop, then convert each in one NumPy call
+                timestamps = []
+                values = []
                 for point in timeseries.get('data', []):
                     timestamp_str = point.get('timeStamp')
                     if timestamp_str:
-                        timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                        
                         # Get the aggregated value (average, maximum, etc.)
-                        value = point.get('average') or point.get('maximum') or point.get('minimum') or point.get('total')
+                        value = point.get(agg_key)
+                        if value is None:
+                            value = next((point[k] for k in fallback_keys if point.get(k) is not None), None)
                         
                         if value is not None:
-                            metrics.append(MetricData(
-                                name=metric_name,
-                                value=float(value),
-                                timestamp=timestamp,
-                                labels=labels.copy(),
-                                unit=self._convert_azure_unit(unit)
-                            ))
-        
-        return metrics
+                            timestamps.append(timestamp_str)
+                            values.append(value)
+                
+                if values:
+                    parsed_timestamps, parsed_values = self._utc_columns(timestamps, values)
+                    if len(parsed_values):
+                        series.append(MetricSeries(
+                            name=metric_name,
+                            unit=unit,
+                            labels=shared_labels,
+                            timestamps=parsed_timestamps,
+                            values=parsed_values
+                        ))
+        
+        return series
     
-    def _parse_kql_results(self, data: Dict[str, Any]) -> List[MetricData]:
-        """Parse KQL query results"""
-        metrics = []
+    def _parse_kql_results(self, data: Dict[str, Any]) -> List[MetricSeries]:
+        """Parse KQL query results into one MetricSeries per distinct combination of label columns"""
+        series = []
         
         tables = data.get('tables', [])
         for table in tables:
@@ -299,43 +558,82 @@ class AzureMonitorConnector(BaseConnector):
             value_col = None
             
             for i, col in enumerate(columns):
-                col_name = col.get('name', '').lower()
                 col_type = col.get('type', '')
                 
                 if col_type == 'datetime' and time_col is None:
                     time_col = i
-                elif col_type in ['real', 'long', 'int'] and 'time' not in col_name:
+                elif col_type in _NUMERIC_KQL_TYPES and 'time' not in col.get('name', '').lower():
                     value_col = i
             
             if time_col is not None and value_col is not None:
+                # Label columns are fixed per table, so resolve their positions and names once
+                label_cols = [
+                    (i, col.get('name', f'col_{i}'))
+                    for i, col in enumerate(columns)
+                    if i != time_col and i != value_col
+                ]
+                
+                # Per-column (type, value) -> str, so repeated values in low-cardinality
+                # columns (regions, hosts) are stringified once and share one object
+                str_caches = [{} for _ in label_cols]
+                
+                # label values tuple -> (labels, timestamps, values)
+                groups: Dict[tuple, tuple] = {}
                 for row in rows:
                     try:
-                        timestamp = datetime.fromisoformat(row[time_col].replace('Z', '+00:00'))
+                        timestamp = row[time_col]
                         value = float(row[value_col])
-                        
-                        # Create labels from other columns
-                        labels = {}
-                        for i, col in enumerate(columns):
-                            if i not in [time_col, value_col] and i < len(row):
-                                labels[col.get('name', f'col_{i}')] = str(row[i])
-                        
-                        metrics.append(MetricData(
+                        if not isinstance(timestamp, str):
+                            continue
+                    except (ValueError, TypeError, IndexError):
+                        continue
+                    
+                    # Create labels from other columns
+                    row_len = len(row)
+                    label_values = tuple(
+                        self._cached_str(row[i], cache) if i < row_len else None
+                        for (i, _), cache in zip(label_cols, str_caches)
+                    )
+                    
+                    group = groups.get(label_values)
+                    if group is None:
+                        labels = {name: v for (_, name), v in zip(label_cols, label_values) if v is not None}
+                        group = groups[label_values] = (labels, [], [])
+                    group[1].append(timestamp)
+                    group[2].append(value)
+                
+                for labels, timestamps, values in groups.values():
+                    parsed_timestamps, parsed_values = self._utc_columns(timestamps, values)
+                    if len(parsed_values):
+                        series.append(MetricSeries(
                             name="kql_result",
-                            value=value,
-                            timestamp=timestamp,
+                            unit="count",
                             labels=labels,
-                            unit="count"
+                            timestamps=parsed_timestamps,
+                            values=parsed_values
                         ))
-                    except (ValueError, TypeError, IndexError):
-                        continue
         
-        return metrics
+        return series
+    
+    @staticmethod
+    def _cached_str(value: Any, cache: Dict[tuple, str]) -> str:
+        """str(value), reusing the string already built for an equal value of the same type"""
+        if value.__class__ is str:
+            return value
+        key = (value.__class__, value)
+        try:
+            text = cache.get(key)
+        except TypeError:  # dynamic columns hold lists and dicts
+            return str(value)
+        if text is None:
+            text = cache[key] = str(value)
+        return text
     
-    def _parse_azure_alerts(self, data: Dict[str, Any]) -> List[AlertData]:
-        """Parse Azure Monitor alerts response"""
+    def _parse_azure_alerts(self, items: List[Dict[str, Any]]) -> List[AlertData]:
+        """Parse the alert objects from Azure Monitor's alerts listing"""
         alerts = []
         
-        for alert in data.get('value', []):
+        for alert in items:
             properties = alert.get('properties', {})
             essentials = properties.get('essentials', {})
             
@@ -344,9 +642,7 @@ class AzureMonitorConnector(BaseConnector):
                 severity=essentials.get('severity', 'Sev3').lower(),
                 description=properties.get('context', {}).get('description', ''),
                 service=essentials.get('targetResourceName', 'unknown'),
-                timestamp=datetime.fromisoformat(
-                    essentials.get('firedDateTime', datetime.now().isoformat()).replace('Z', '+00:00')
-                ),
+                timestamp=parse_timestamp(essentials.get('firedDateTime')),
                 labels=essentials
             ))
         
@@ -1,12 +1,144 @@
+import aiohttp
+import copy
+import functools
+import logging
+import orjson
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Histogram
 from ..models import MetricData, AlertData
 
+logger = logging.getLogger(__name__)
+
+_CONNECTOR_CALLS = Counter(
+    'connector_calls_total', 'Connector method calls by outcome', ['connector', 'method', 'outcome']
+)
+_CONNECTOR_LATENCY = Histogram(
+    'connector_call_seconds', 'Connector method latency in seconds', ['connector', 'method']
+)
+
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+except ImportError:
+    _parse_iso = datetime.fromisoformat  # Accepts a trailing 'Z' on Python 3.11+
+
+_UTC = timezone.utc
+
+# Sent on every request made through a connector session
+_DEFAULT_HEADERS = {"User-Agent": "ai-monitoring-agent/1.0"}
+
+def parse_timestamp(value: Optional[str]) -> datetime:
+    """Parse an ISO 8601 timestamp from a monitoring API, defaulting to now (UTC) when absent"""
+    if not value:
+        return datetime.now(_UTC)
+    return _parse_iso(value)
+
+def instrumented(method):
+    """Time, count and log every call of a connector coroutine method, re-raising failures
+    
+    Calls are counted per connector, method and outcome. Errors are not turned into
+    empty results here: ConnectorManager needs them to trip circuit breakers and mark
+    connectors unhealthy, and it supplies the defaults API callers see.
+    """
+    name = method.__name__
+    
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return await method(self, *args, **kwargs)
+        except Exception as e:
+            outcome = 'error'
+            logger.warning(f"{self.name}.{name} failed: {e!r}")
+            raise
+        finally:
+            _CONNECTOR_LATENCY.labels(self.name, name).observe(time.perf_counter() - start)
+            _CONNECTOR_CALLS.labels(self.name, name, outcome).inc()
+    return wrapper
+
+def raise_for_server_error(response: aiohttp.ClientResponse):
+    """Raise for 5xx and 429 answers so an outage reaches the manager as an error
+    
+    Other non-200 answers (a rejected query, a missing resource) are the caller's
+    problem rather than the backend's and stay ordinary empty results.
+    """
+    if response.status >= 500 or response.status == 429:
+        response.raise_for_status()
+
+def async_ttl_cache(ttl: int = 300, cacheable: Callable[[Any], bool] = bool):
+    """Cache a connector coroutine method's result on the instance for ttl seconds
+    
+    Entries are keyed by method name and arguments. Only results for which
+    cacheable(result) is true are stored (by default, non-empty ones), so a call
+    that came back empty is retried on the next request. Callers get their own
+    deep copy, so mutating a result never alters what the cache holds.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, frozenset(kwargs.items()))
+            cached = self._ttl_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return copy.deepcopy(cached[1])
+            
+            value = await method(self, *args, **kwargs)
+            if cacheable(value):
+                self._ttl_cache[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            return value
+        return wrapper
+    return decorator
+
+def _summary_has_data(summary: Dict[str, Any]) -> bool:
+    """Whether a metrics summary found any services or metrics worth caching"""
+    return bool(summary.get("services") or summary.get("metric_names"))
+
 class BaseConnector(ABC):
     """Base class for all monitoring data connectors"""
     
     def __init__(self, name: str):
         self.name = name
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Results of @async_ttl_cache methods as key -> (monotonic expiry, value)
+        self._ttl_cache: Dict[Tuple, Tuple[float, Any]] = {}
+    
+    def invalidate_cache(self):
+        """Drop cached catalog results so the next call refetches them"""
+        self._ttl_cache.clear()
+    
+    def _session_kwargs(self) -> Dict[str, Any]:
+        """Extra ClientSession arguments (auth, headers) for this connector"""
+        return {}
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the connector's pooled HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            # Keep-alive connections are reused across calls instead of a TCP+TLS handshake per request
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=30, ttl_dns_cache=300, keepalive_timeout=75)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=30),
+                headers=_DEFAULT_HEADERS,
+                **self._session_kwargs()
+            )
+        return self._session
+    
+    @staticmethod
+    def _json_body(headers: Dict[str, str], obj: Any) -> Dict[str, Any]:
+        """Request kwargs sending obj as an orjson-encoded JSON body"""
+        return {"headers": {**headers, "Content-Type": "application/json"}, "data": orjson.dumps(obj)}
+    
+    async def start(self):
+        """Open the HTTP session up front so the first request does not pay for it"""
+        await self._get_session()
+    
+    async def aclose(self):
+        """Close the connector's HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
     
     @abstractmethod
     async def health_check(self) -> bool:
@@ -33,23 +165,16 @@ class BaseConnector(ABC):
         """Get list of available metrics"""
         pass
     
+    @async_ttl_cache(ttl=300, cacheable=_summary_has_data)
     async def get_metrics_summary(self) -> Dict[str, Any]:
         """Get a summary of available metrics and services"""
-        try:
-            services = await self.get_services()
-            metrics = await self.get_metrics_list()
-            
-            return {
-                "connector": self.name,
-                "services": services[:50],  # Limit for performance
-                "metric_names": metrics[:100],  # Limit for performance
-                "service_count": len(services),
-                "metric_count": len(metrics)
-            }
-        except Exception as e:
-            return {
-                "connector": self.name,
-                "error": str(e),
-                "services": [],
-                "metric_names": []
-            }
\ No newline at end of file
+        services = await self.get_services()
+        metrics = await self.get_metrics_list()
+        
+        return {
+            "connector": self.name,
+            "services": services[:50],  # Limit for performance
+            "metric_names": metrics[:100],  # Limit for performance
+            "service_count": len(services),
+            "metric_count": len(metrics)
+        }
@@ -1,5 +1,7 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional, Type
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type
 from .base import BaseConnector
 from .prometheus import PrometheusConnector
 from .azure_monitor import AzureMonitorConnector
@@ -7,12 +9,59 @@ from ..config import Settings
 
 logger = logging.getLogger(__name__)
 
+class CircuitBreaker:
+    """Stops calling a connector after repeated failures, then lets one trial call through
+    
+    CLOSED: calls pass. OPEN: calls are skipped until reset_timeout seconds after the
+    last failure. HALF_OPEN: one trial call is in flight; success closes, failure re-opens.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failure_count = 0
+        self.last_failure_ts = 0.0
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.last_failure_ts >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            return True
+        return False
+    
+    def record_success(self):
+        """Close the circuit after a call succeeded"""
+        self.state = self.CLOSED
+        self.failure_count = 0
+    
+    def record_failure(self):
+        """Count a failed call, opening the circuit at the threshold or after a failed trial"""
+        self.failure_count += 1
+        self.last_failure_ts = time.monotonic()
+        if self.state == self.HALF_OPEN or self.failure_count >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit opened after {self.failure_count} consecutive failure(s)")
+            self.state = self.OPEN
+
 class ConnectorManager:
     """Manages all monitoring data connectors"""
     
     def __init__(self, settings: Settings):
         self.settings = settings
         self.connectors: Dict[str, BaseConnector] = {}
+        self._version = 0
+        # Recent health results as name -> (monotonic expiry, healthy), shared by the fan-out methods
+        self._health_cache: Dict[str, Tuple[float, bool]] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._recheck_tasks: Set[asyncio.Task] = set()
+        self._breakers: Dict[str, CircuitBreaker] = {}
         self._initialize_connectors()
     
     def _initialize_connectors(self):
@@ -23,7 +72,9 @@ class ConnectorManager:
                 self.connectors["prometheus"] = PrometheusConnector(
                     base_url=self.settings.prometheus_url,
                     username=self.settings.prometheus_username,
-                    password=self.settings.prometheus_password
+                    password=self.settings.prometheus_password,
+                    cache_ttl=self.settings.promql_cache_ttl,
+                    alertmanager_url=self.settings.alertmanager_url or None
                 )
                 logger.info("Prometheus connector initialized")
             
@@ -42,6 +93,13 @@ class ConnectorManager:
                 )
                 logger.info("Azure Monitor connector initialized")
             
+            self._version += 1
+            self._health_cache.clear()
+            self._breakers = {
+                name: CircuitBreaker(self.settings.connector_breaker_threshold, self.settings.connector_breaker_reset)
+                for name in self.connectors
+            }
+            
             if not self.connectors:
                 logger.warning("No monitoring connectors configured")
             else:
@@ -50,105 +108,258 @@ class ConnectorManager:
         except Exception as e:
             logger.error(f"Error initializing connectors: {e}")
     
-    async def health_check_all(self) -> Dict[str, bool]:
-        """Check health of all connectors"""
+    async def _fan_out(
+        self,
+        connectors: List[BaseConnector],
+        call: Callable[[BaseConnector], Awaitable[Any]],
+        concurrency: Optional[int] = None,
+        default: Optional[Callable[[BaseConnector], Any]] = None
+    ) -> List[Any]:
+        """Run call(connector) for every connector concurrently
+        
+        At most min(len(connectors), concurrency) calls are in flight at once;
+        concurrency defaults to settings.connector_concurrency (10). Each call is
+        capped at settings.connector_timeout seconds so one slow backend cannot
+        stall the rest. Exceptions (including asyncio.TimeoutError) are returned
+        in place of results, in connector order.
+        
+        When default is given, connectors whose circuit breaker is open are not
+        called at all and get default(connector) as their result. Every call that
+        runs feeds its outcome to the breaker: connector methods raise on failure
+        (see base.instrumented), so an exception or a False health check is a
+        failure and anything else, empty results included, is a success.
+        """
+        if not connectors:
+            return []
+        
+        results: List[Any] = [None] * len(connectors)
+        running = []
+        for i, connector in enumerate(connectors):
+            breaker = self._breakers.get(connector.name)
+            if default is not None and breaker is not None and not breaker.allow():
+                results[i] = default(connector)
+            else:
+                running.append(i)
+        
+        if not running:
+            return results
+        
+        semaphore = asyncio.Semaphore(max(1, min(len(running), concurrency or self.settings.connector_concurrency)))
+        
+        async def bounded(connector: BaseConnector) -> Any:
+            async with semaphore:
+                return await asyncio.wait_for(call(connector), timeout=self.settings.connector_timeout)
+        
+        outcomes = await asyncio.gather(*(bounded(connectors[i]) for i in running), return_exceptions=True)
+        
+        for i, outcome in zip(running, outcomes):
+            breaker = self._breakers.get(connectors[i].name)
+            if breaker is not None:
+                if isinstance(outcome, BaseException) or outcome is False:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            results[i] = outcome
+        
+        return results
+    
+    async def _check_health(self, concurrency: Optional[int] = None) -> Dict[str, bool]:
+        """Health of every connector, probing only those without a fresh cached result"""
+        now = time.monotonic()
         results = {}
+        stale = []
         
         for name, connector in self.connectors.items():
-            try:
-                results[name] = await connector.health_check()
-                logger.debug(f"Health check for {name}: {results[name]}")
-            except Exception as e:
-                logger.error(f"Health check failed for {name}: {e}")
-                results[name] = False
+            cached = self._health_cache.get(name)
+            if cached and cached[0] > now:
+                results[name] = cached[1]
+            else:
+                stale.append((name, connector))
         
-        return results
+        if stale:
+            results.update(await self._probe_health([name for name, _ in stale], concurrency))
+        
+        # Keep connector order regardless of which results came from the cache
+        return {name: results[name] for name in self.connectors}
     
-    async def get_healthy_connectors(self) -> List[BaseConnector]:
-        """Get list of healthy connectors"""
-        healthy = []
+    async def _probe_health(self, names: List[str], concurrency: Optional[int] = None) -> Dict[str, bool]:
+        """Run health checks for the named connectors and cache the results"""
+        names = [name for name in names if name in self.connectors]
+        checks = await self._fan_out([self.connectors[name] for name in names], lambda c: c.health_check(), concurrency)
         
-        for connector in self.connectors.values():
+        # While the background loop runs, results stay valid until its next pass
+        if self._health_task is not None:
+            ttl = self.settings.connector_health_interval * 2
+        else:
+            ttl = self.settings.connector_health_ttl
+        expires = time.monotonic() + ttl
+        
+        results = {}
+        for name, healthy in zip(names, checks):
+            if isinstance(healthy, Exception):
+                logger.error(f"Health check failed for {name}: {healthy}")
+                healthy = False
+            else:
+                logger.debug(f"Health check for {name}: {healthy}")
+            if not healthy:
+                # Catalogs cached while the source was up may no longer be accurate once it recovers
+                self.connectors[name].invalidate_cache()
+            self._health_cache[name] = (expires, healthy)
+            results[name] = healthy
+        
+        return results
+    
+    async def _health_loop(self):
+        """Refresh every connector's health in the background so requests never wait on probes"""
+        while True:
+            await asyncio.sleep(self.settings.connector_health_interval)
             try:
-                if await connector.health_check():
-                    healthy.append(connector)
+                await self._probe_health(list(self.connectors))
             except Exception as e:
-                logger.error(f"Error checking connector health: {e}")
+                logger.error(f"Background health check failed: {e}")
+    
+    def _mark_unhealthy(self, name: str):
+        """Take a connector out of rotation after a failed call and re-check it out of band
         
-        return healthy
+        Called by the get_all_* and query methods whenever a connector call raises, so
+        query failures update health between passes of the background loop.
+        """
+        self._health_cache[name] = (time.monotonic() + self.settings.connector_health_interval * 2, False)
+        task = asyncio.create_task(self._probe_health([name]))
+        self._recheck_tasks.add(task)
+        task.add_done_callback(self._recheck_tasks.discard)
+    
+    async def start(self):
+        """Open connector sessions and probe every connector once, then keep health fresh from a background task"""
+        if self._health_task is None:
+            await asyncio.gather(*(c.start() for c in self.connectors.values()))
+            self._health_task = asyncio.create_task(self._health_loop())
+            await self._probe_health(list(self.connectors))
+    
+    async def stop(self):
+        """Stop the background health task"""
+        tasks = [t for t in (self._health_task, *self._recheck_tasks) if t is not None]
+        self._health_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def health_check_all(self, concurrency: Optional[int] = None) -> Dict[str, bool]:
+        """Check health of all connectors"""
+        return await self._check_health(concurrency)
+    
+    async def get_healthy_connectors(self, concurrency: Optional[int] = None) -> List[BaseConnector]:
+        """Get list of healthy connectors"""
+        health = await self._check_health(concurrency)
+        return [connector for name, connector in self.connectors.items() if health[name]]
+    
+    def refresh(self):
+        """Forget cached health and catalog results so the next calls refetch them"""
+        self._health_cache.clear()
+        for connector in self.connectors.values():
+            connector.invalidate_cache()
+    
+    async def close_all(self):
+        """Close the HTTP sessions held by all connectors"""
+        results = await asyncio.gather(*(c.aclose() for c in self.connectors.values()), return_exceptions=True)
+        for name, result in zip(self.connectors.keys(), results):
+            if isinstance(result, Exception):
+                logger.error(f"Error closing {name} connector: {result}")
     
     def get_connector(self, name: str) -> Optional[BaseConnector]:
         """Get a specific connector by name"""
         return self.connectors.get(name)
     
+    def version(self) -> int:
+        """Get a counter that changes whenever the connector set changes"""
+        return self._version
+    
     def list_connectors(self) -> List[str]:
         """Get list of all connector names"""
         return list(self.connectors.keys())
     
-    async def query_all_connectors(self, query: str, **kwargs) -> Dict[str, List]:
-        """Query all healthy connectors"""
+    async def query_all_connectors(self, query: str, concurrency: Optional[int] = None, **kwargs) -> Dict[str, List]:
+        """Query all connectors; an unreachable connector simply fails and returns no results"""
         results = {}
-        healthy_connectors = await self.get_healthy_connectors()
+        connectors = list(self.connectors.values())
+        responses = await self._fan_out(
+            connectors, lambda c: c.query_metrics(query, **kwargs), concurrency, default=lambda c: []
+        )
         
-        for connector in healthy_connectors:
-            try:
-                metrics = await connector.query_metrics(query, **kwargs)
+        for connector, metrics in zip(connectors, responses):
+            if isinstance(metrics, BaseException):
+                logger.error(f"Error querying {connector.name}: {metrics}")
+                self._mark_unhealthy(connector.name)
+                results[connector.name] = []
+            else:
                 results[connector.name] = metrics
                 logger.debug(f"Query '{query}' returned {len(metrics)} results from {connector.name}")
-            except Exception as e:
-                logger.error(f"Error querying {connector.name}: {e}")
-                results[connector.name] = []
         
         return results
     
-    async def get_all_alerts(self) -> Dict[str, List]:
+    async def get_all_alerts(self, concurrency: Optional[int] = None) -> Dict[str, List]:
         """Get alerts from all healthy connectors"""
         results = {}
-        healthy_connectors = await self.get_healthy_connectors()
+        healthy_connectors = await self.get_healthy_connectors(concurrency)
+        responses = await self._fan_out(healthy_connectors, lambda c: c.get_active_alerts(), concurrency, default=lambda c: [])
         
-        for connector in healthy_connectors:
-            try:
-                alerts = await connector.get_active_alerts()
+        for connector, alerts in zip(healthy_connectors, responses):
+            if isinstance(alerts, BaseException):
+                logger.error(f"Error getting alerts from {connector.name}: {alerts}")
+                self._mark_unhealthy(connector.name)
+                results[connector.name] = []
+            else:
                 results[connector.name] = alerts
                 logger.debug(f"Got {len(alerts)} alerts from {connector.name}")
-            except Exception as e:
-                logger.error(f"Error getting alerts from {connector.name}: {e}")
-                results[connector.name] = []
         
         return results
     
-    async def get_all_services(self) -> Dict[str, List[str]]:
+    async def get_all_services(self, concurrency: Optional[int] = None) -> Dict[str, List[str]]:
         """Get services from all healthy connectors"""
         results = {}
-        healthy_connectors = await self.get_healthy_connectors()
+        healthy_connectors = await self.get_healthy_connectors(concurrency)
+        responses = await self._fan_out(healthy_connectors, lambda c: c.get_services(), concurrency, default=lambda c: [])
         
-        for connector in healthy_connectors:
-            try:
-                services = await connector.get_services()
+        for connector, services in zip(healthy_connectors, responses):
+            if isinstance(services, BaseException):
+                logger.error(f"Error getting services from {connector.name}: {services}")
+                self._mark_unhealthy(connector.name)
+                results[connector.name] = []
+            else:
                 results[connector.name] = services
                 logger.debug(f"Got {len(services)} services from {connector.name}")
-            except Exception as e:
-                logger.error(f"Error getting services from {connector.name}: {e}")
-                results[connector.name] = []
         
         return results
     
-    async def get_all_metrics_summary(self) -> Dict[str, Dict]:
+    @staticmethod
+    def _unavailable_summary(connector: BaseConnector) -> Dict[str, Any]:
+        """Summary reported for a connector skipped by its open circuit breaker"""
+        return {
+            "connector": connector.name,
+            "error": "connector unavailable (circuit open)",
+            "services": [],
+            "metric_names": []
+        }
+    
+    async def get_all_metrics_summary(self, concurrency: Optional[int] = None) -> Dict[str, Dict]:
         """Get metrics summary from all healthy connectors"""
         results = {}
-        healthy_connectors = await self.get_healthy_connectors()
+        healthy_connectors = await self.get_healthy_connectors(concurrency)
+        responses = await self._fan_out(
+            healthy_connectors, lambda c: c.get_metrics_summary(), concurrency, default=self._unavailable_summary
+        )
         
-        for connector in healthy_connectors:
-            try:
-                summary = await connector.get_metrics_summary()
-                results[connector.name] = summary
-            except Exception as e:
-                logger.error(f"Error getting metrics summary from {connector.name}: {e}")
+        for connector, summary in zip(healthy_connectors, responses):
+            if isinstance(summary, BaseException):
+                logger.error(f"Error getting metrics summary from {connector.name}: {summary}")
+                self._mark_unhealthy(connector.name)
                 results[connector.name] = {
                     "connector": connector.name,
-                    "error": str(e),
+                    "error": str(summary),
                     "services": [],
                     "metric_names": []
                 }
+            else:
+                results[connector.name] = summary
         
-        return results
\ No newline at end of file
+        return results
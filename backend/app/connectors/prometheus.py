@@ -1,138 +1,282 @@
 import aiohttp
-import json
+import asyncio
+import functools
+import orjson
 import logging
-from datetime import datetime, timedelta
+import time
+from cachetools import TTLCache
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
-from urllib.parse import urljoin, quote
+from urllib.parse import urljoin, quote, urlsplit, urlunsplit
 
-from .base import BaseConnector
+from .base import BaseConnector, async_ttl_cache, instrumented, parse_timestamp, raise_for_server_error
 from ..models import MetricData, AlertData
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 logger = logging.getLogger(__name__)
 
+# Units inferred from metric-name keywords; earlier entries win when several match
+_UNIT_KEYWORDS = (
+    ('bytes', ('bytes', 'size', 'memory')),
+    ('seconds', ('duration', 'time', 'latency')),
+    ('per_second', ('rate', 'rps', 'qps')),
+    ('percent', ('percent', 'ratio')),
+    ('count', ('count', 'total', 'num')),
+)
+
+def _build_unit_automaton():
+    """Compile every unit keyword into one Aho-Corasick automaton valued (priority, unit)"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for rank, (unit, keywords) in enumerate(_UNIT_KEYWORDS):
+        for keyword in keywords:
+            automaton.add_word(keyword, (rank, unit))
+    automaton.make_automaton()
+    return automaton
+
+_UNIT_AUTOMATON = _build_unit_automaton()
+
+@functools.lru_cache(maxsize=4096)
+def _infer_unit(metric_name: str) -> str:
+    """Infer the unit of measurement from metric name; memoized since the same names recur in every result"""
+    metric_lower = metric_name.lower()
+    
+    if _UNIT_AUTOMATON is not None:
+        # One pass over the name finds every keyword; the highest-priority unit wins
+        return min((match for _, match in _UNIT_AUTOMATON.iter(metric_lower)), default=(None, 'unknown'))[1]
+    
+    for unit, keywords in _UNIT_KEYWORDS:
+        if any(x in metric_lower for x in keywords):
+            return unit
+    return 'unknown'
+
+# Buffered responses larger than this are decoded and parsed off the event loop
+_THREAD_PARSE_BYTES = 256 * 1024
+
 class PrometheusConnector(BaseConnector):
     """Connector for Prometheus metrics API"""
     
-    def __init__(self, base_url: str, username: Optional[str] = None, password: Optional[str] = None):
+    # Instant query results are bucketed by this many seconds so they are never staler than one bucket
+    _INSTANT_BUCKET_SECONDS = 5
+    
+    def __init__(
+        self,
+        base_url: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        cache_ttl: int = 30,
+        alertmanager_url: Optional[str] = None
+    ):
         super().__init__("prometheus")
         self.base_url = base_url.rstrip('/')
+        self.alertmanager_url = (alertmanager_url or self._default_alertmanager_url(self.base_url)).rstrip('/')
+        self._query_url = f"{self.base_url}/api/v1/query"
+        self._range_url = f"{self.base_url}/api/v1/query_range"
+        self._labels_url = f"{self.base_url}/api/v1/label/__name__/values"
+        self._alerts_url = f"{self.alertmanager_url}/api/v1/alerts"
         self.auth = aiohttp.BasicAuth(username, password) if username and password else None
-        
+        # Recent PromQL results, keyed by (query, query_type, step, time bucket)
+        self._query_cache: TTLCache = TTLCache(maxsize=1024, ttl=cache_ttl)
+        # Fetches currently in progress under the same keys, shared by concurrent callers
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+    
+    @staticmethod
+    def _default_alertmanager_url(base_url: str) -> str:
+        """Assume Alertmanager runs beside Prometheus on its default port when no URL is configured"""
+        parts = urlsplit(base_url)
+        if parts.port != 9090:
+            return base_url
+        host = parts.netloc.rsplit(':', 1)[0]
+        return urlunsplit(parts._replace(netloc=f"{host}:9093"))
+    
+    def _session_kwargs(self) -> Dict[str, Any]:
+        """Send basic auth on every request made through the shared session"""
+        return {"auth": self.auth}
+    
+    @instrumented
     async def health_check(self) -> bool:
         """Check Prometheus connectivity"""
-        try:
-            async with aiohttp.ClientSession(auth=self.auth) as session:
-                url = f"{self.base_url}/api/v1/query"
-                params = {"query": "up"}
-                
-                async with session.get(url, params=params, timeout=10) as response:
-                    return response.status == 200
-        except Exception as e:
-            logger.error(f"Prometheus health check failed: {e}")
-            return False
+        session = await self._get_session()
+        params = {"query": "up"}
+        
+        async with session.get(self._query_url, params=params, timeout=10) as response:
+            return response.status == 200
     
+    @instrumented
     async def query_metrics(self, query: str, **kwargs) -> List[MetricData]:
-        """Execute a PromQL query"""
-        try:
-            async with aiohttp.ClientSession(auth=self.auth) as session:
-                # Handle both instant and range queries
-                time_range = kwargs.get('time_range', '1h')
-                query_type = kwargs.get('query_type', 'instant')
-                
-                if query_type == 'range':
-                    url = f"{self.base_url}/api/v1/query_range"
-                    params = {
-                        "query": query,
-                        "start": (datetime.now() - timedelta(hours=1)).isoformat(),
-                        "end": datetime.now().isoformat(),
-                        "step": kwargs.get('step', '30s')
-                    }
-                else:
-                    url = f"{self.base_url}/api/v1/query"
-                    params = {"query": query}
-                
-                async with session.get(url, params=params, timeout=30) as response:
-                    if response.status != 200:
-                        logger.error(f"Prometheus query failed: {response.status}")
-                        return []
-                    
-                    data = await response.json()
-                    return self._parse_prometheus_response(data)
-        
-        except Exception as e:
-            logger.error(f"Error querying Prometheus: {e}")
-            return []
+        """Execute a PromQL query, answering repeats within the cache TTL from memory
+        
+        Concurrent identical queries share one request to Prometheus.
+        """
+        query_type = kwargs.get('query_type', 'instant')
+        step = kwargs.get('step', '30s') if query_type == 'range' else None
+        bucket = int(time.time() // self._INSTANT_BUCKET_SECONDS) if query_type != 'range' else None
+        key = (query, query_type, step, bucket)
+        
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        fetch = self._inflight.get(key)
+        if fetch is None:
+            fetch = asyncio.create_task(self._fetch_and_cache(key, query, **kwargs))
+            self._inflight[key] = fetch
+            fetch.add_done_callback(functools.partial(self._fetch_done, key))
+        # Every caller, the first included, waits through a shield so one caller being
+        # cancelled (e.g. by the manager's timeout) never cancels the others' shared fetch
+        return await asyncio.shield(fetch)
     
-    async def get_active_alerts(self) -> List[AlertData]:
-        """Get active alerts from Alertmanager"""
-        try:
-            # Try to get alerts from Alertmanager API
-            alertmanager_url = self.base_url.replace(':9090', ':9093')  # Default Alertmanager port
-            
-            async with aiohttp.ClientSession(auth=self.auth) as session:
-                url = f"{alertmanager_url}/api/v1/alerts"
-                
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._parse_alertmanager_response(data)
-                    
-            # Fallback: query alert rules from Prometheus
-            alert_query = "ALERTS{alertstate=\"firing\"}"
-            metrics = await self.query_metrics(alert_query)
+    async def _fetch_and_cache(self, key: tuple, query: str, **kwargs) -> List[MetricData]:
+        """Fetch a query shared by concurrent callers and cache a non-empty result"""
+        metrics = await self._fetch_metrics(query, **kwargs)
+        if metrics:
+            self._query_cache[key] = metrics
+        return metrics
+    
+    def _fetch_done(self, key: tuple, fetch: asyncio.Task):
+        """Forget a finished shared fetch, retrieving its error in case every caller gave up on it"""
+        if self._inflight.get(key) is fetch:
+            del self._inflight[key]
+        if not fetch.cancelled():
+            fetch.exception()
+    
+    async def _fetch_metrics(self, query: str, **kwargs) -> List[MetricData]:
+        """Send a PromQL query to Prometheus"""
+        session = await self._get_session()
+        # Handle both instant and range queries
+        time_range = kwargs.get('time_range', '1h')
+        query_type = kwargs.get('query_type', 'instant')
+        
+        if query_type == 'range':
+            url = self._range_url
+            params = {
+                "query": query,
+                "start": (datetime.now() - timedelta(hours=1)).isoformat(),
+                "end": datetime.now().isoformat(),
+                "step": kwargs.get('step', '30s')
+            }
+        else:
+            url = self._query_url
+            params = {"query": query}
+        
+        async with session.get(url, params=params, timeout=30) as response:
+            if response.status != 200:
+                logger.error(f"Prometheus query failed: {response.status}")
+                raise_for_server_error(response)
+                return []
             
-            alerts = []
-            for metric in metrics:
-                alerts.append(AlertData(
-                    name=metric.labels.get('alertname', 'Unknown'),
-                    severity=metric.labels.get('severity', 'warning'),
-                    description=metric.labels.get('description', ''),
-                    service=metric.labels.get('service', metric.labels.get('job', 'unknown')),
-                    timestamp=datetime.now(),
-                    labels=metric.labels
-                ))
+            # A body known to be large is buffered and parsed in a worker thread; streaming it
+            # through ijson would still run all of that parsing on the event loop
+            if ijson is None or (response.content_length or 0) > _THREAD_PARSE_BYTES:
+                raw = await response.read()
+                if len(raw) > _THREAD_PARSE_BYTES:
+                    return await asyncio.to_thread(self._parse_raw_response, raw)
+                return self._parse_raw_response(raw)
             
+            # Small or unknown-length (chunked, compressed) bodies are streamed: items are emitted
+            # as they arrive, and the loop is only held for one chunk's parsing at a time.
+            # Prometheus only answers 200 with status "success", so the status needn't be read first.
+            metrics = []
+            async for item in ijson.items(response.content, 'data.result.item', use_float=True):
+                metrics.extend(self._emit_metric_data(item))
+            return metrics
+    
+    @instrumented
+    async def get_active_alerts(self) -> List[AlertData]:
+        """Get active alerts from Alertmanager, falling back to Prometheus' ALERTS series
+        
+        Both sources are queried at once so the fallback costs no extra round-trip;
+        the Prometheus query is cancelled when Alertmanager answers.
+        """
+        fallback = asyncio.create_task(self._get_firing_alerts())
+        # The fallback's error only matters if it is awaited; don't let an unused one be reported
+        fallback.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            alerts = await self._get_alertmanager_alerts()
+        except Exception:
+            fallback.cancel()
+            raise
+        
+        if alerts is not None:
+            fallback.cancel()
             return alerts
-            
-        except Exception as e:
-            logger.error(f"Error getting alerts: {e}")
-            return []
+        return await fallback
+    
+    async def _get_alertmanager_alerts(self) -> Optional[List[AlertData]]:
+        """Get alerts from the Alertmanager API, or None when it is unreachable"""
+        session = await self._get_session()
+        
+        try:
+            async with session.get(self._alerts_url, timeout=10) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    return self._parse_alertmanager_response(data)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Alertmanager unavailable, using Prometheus alerts: {e}")
+        
+        return None
     
+    async def _get_firing_alerts(self) -> List[AlertData]:
+        """Build alerts from Prometheus' firing ALERTS series"""
+        alert_query = "ALERTS{alertstate=\"firing\"}"
+        metrics = await self.query_metrics(alert_query)
+        
+        alerts = []
+        for metric in metrics:
+            alerts.append(AlertData(
+                name=metric.labels.get('alertname', 'Unknown'),
+                severity=metric.labels.get('severity', 'warning'),
+                description=metric.labels.get('description', ''),
+                service=metric.labels.get('service', metric.labels.get('job', 'unknown')),
+                timestamp=datetime.now(timezone.utc),
+                labels=metric.labels
+            ))
+        
+        return alerts
+    
+    @async_ttl_cache(ttl=300)
+    @instrumented
     async def get_services(self) -> List[str]:
         """Get list of services from Prometheus targets"""
-        try:
-            # Query for all job labels
-            query = "group by (job) ({__name__=~\".+\"})"
-            metrics = await self.query_metrics(query)
-            
-            services = set()
-            for metric in metrics:
-                job = metric.labels.get('job')
-                if job:
-                    services.add(job)
-            
-            return sorted(list(services))
-            
-        except Exception as e:
-            logger.error(f"Error getting services: {e}")
-            return []
+        # Query for all job labels
+        query = "group by (job) ({__name__=~\".+\"})"
+        metrics = await self.query_metrics(query)
+        
+        services = set()
+        for metric in metrics:
+            job = metric.labels.get('job')
+            if job:
+                services.add(job)
+        
+        return sorted(list(services))
     
+    @async_ttl_cache(ttl=300)
+    @instrumented
     async def get_metrics_list(self) -> List[str]:
         """Get list of available metrics"""
-        try:
-            async with aiohttp.ClientSession(auth=self.auth) as session:
-                url = f"{self.base_url}/api/v1/label/__name__/values"
-                
-                async with session.get(url, timeout=30) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get('data', [])
-            
-            return []
-            
-        except Exception as e:
-            logger.error(f"Error getting metrics list: {e}")
-            return []
+        session = await self._get_session()
+        
+        async with session.get(self._labels_url, timeout=30) as response:
+            raise_for_server_error(response)
+            if response.status == 200:
+                data = orjson.loads(await response.read())
+                return data.get('data', [])
+        
+        return []
+    
+    def _parse_raw_response(self, raw: bytes) -> List[MetricData]:
+        """Decode a buffered Prometheus response body and parse it"""
+        return self._parse_prometheus_response(orjson.loads(raw))
     
     def _parse_prometheus_response(self, data: Dict[str, Any]) -> List[MetricData]:
         """Parse Prometheus API response into MetricData objects"""
@@ -142,41 +286,57 @@ class PrometheusConnector(BaseConnector):
             logger.warning(f"Prometheus query failed: {data}")
             return metrics
         
-        result = data.get('data', {}).get('result', [])
+        for item in data.get('data', {}).get('result', []):
+            metrics.extend(self._emit_metric_data(item))
         
-        for item in result:
-            metric_name = item.get('metric', {}).get('__name__', 'unknown')
-            labels = item.get('metric', {})
-            
-            # Handle both instant and range queries
-            if 'value' in item:
-                # Instant query
+        return metrics
+    
+    def _emit_metric_data(self, item: Dict[str, Any]) -> List[MetricData]:
+        """Convert one entry of a Prometheus result into MetricData objects"""
+        labels = item.get('metric', {})
+        metric_name = labels.get('__name__', 'unknown')
+        
+        # Handle both instant and range queries
+        if 'value' in item:
+            # Instant query
+            try:
                 timestamp, value = item['value']
-                try:
-                    metrics.append(MetricData(
-                        name=metric_name,
-                        value=float(value),
-                        timestamp=datetime.fromtimestamp(timestamp),
-                        labels=labels,
-                        unit=self._infer_unit(metric_name)
-                    ))
-                except (ValueError, TypeError):
-                    continue
-            elif 'values' in item:
-                # Range query
-                for timestamp, value in item['values']:
-                    try:
-                        metrics.append(MetricData(
-                            name=metric_name,
-                            value=float(value),
-                            timestamp=datetime.fromtimestamp(timestamp),
-                            labels=labels,
-                            unit=self._infer_unit(metric_name)
-                        ))
-                    except (ValueError, TypeError):
-                        continue
+                return [MetricData(
+                    name=metric_name,
+                    value=float(value),
+                    timestamp=datetime.fromtimestamp(timestamp, timezone.utc),
+                    labels=labels,
+                    unit=_infer_unit(metric_name)
+                )]
+            except (ValueError, TypeError):
+                return []
+        elif 'values' in item:
+            # Range query
+            return self._range_points(metric_name, labels, item['values'])
         
-        return metrics
+        return []
+    
+    def _range_points(self, metric_name: str, labels: Dict[str, str], samples: List[list]) -> List[MetricData]:
+        """Convert a range result's [timestamp, "value"] pairs into MetricData, skipping malformed samples"""
+        unit = _infer_unit(metric_name)
+        fromtimestamp = datetime.fromtimestamp
+        utc = timezone.utc
+        
+        points = []
+        for sample in samples:
+            try:
+                timestamp, value = sample
+                points.append(MetricData(
+                    name=metric_name,
+                    value=float(value),
+                    timestamp=fromtimestamp(timestamp, utc),
+                    labels=labels,
+                    unit=unit
+                ))
+            except (ValueError, TypeError):
+                continue
+        
+        return points
     
     def _parse_alertmanager_response(self, data: Dict[str, Any]) -> List[AlertData]:
         """Parse Alertmanager API response into AlertData objects"""
@@ -192,27 +352,8 @@ class PrometheusConnector(BaseConnector):
                     severity=labels.get('severity', 'warning'),
                     description=annotations.get('description', annotations.get('summary', '')),
                     service=labels.get('service', labels.get('job', 'unknown')),
-                    timestamp=datetime.fromisoformat(
-                        alert.get('startsAt', datetime.now().isoformat()).replace('Z', '+00:00')
-                    ),
+                    timestamp=parse_timestamp(alert.get('startsAt')),
                     labels=labels
                 ))
         
         return alerts
-    
-    def _infer_unit(self, metric_name: str) -> str:
-        """Infer the unit of measurement from metric name"""
-        metric_lower = metric_name.lower()
-        
-        if any(x in metric_lower for x in ['bytes', 'size', 'memory']):
-            return 'bytes'
-        elif any(x in metric_lower for x in ['duration', 'time', 'latency']):
-            return 'seconds'
-        elif any(x in metric_lower for x in ['rate', 'rps', 'qps']):
-            return 'per_second'
-        elif any(x in metric_lower for x in ['percent', 'ratio']):
-            return 'percent'
-        elif any(x in metric_lower for x in ['count', 'total', 'num']):
-            return 'count'
-        else:
-            return 'unknown'
\ No newline at end of file
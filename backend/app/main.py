@@ -1,18 +1,19 @@
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 import uvicorn
 import logging
 from typing import Optional, Dict, Any, List
 import os
-from datetime import datetime
+import time
 import asyncio
+import msgspec
 
 # Import our modules
 from .config import settings
-from .models import ChatRequest, ChatResponse, HealthResponse, ErrorResponse
-from .cache import get_redis_client
+from .models import ChatRequest, ChatResponse, HealthResponse, ErrorResponse, coarse_utcnow
+from .cache import get_redis_client, init_redis_client, close_redis_client, mget_json, mset_json
 from .auth import get_current_user
 
 # Configure logging
@@ -26,24 +27,38 @@ logger = logging.getLogger(__name__)
 connector_manager = None
 conversation_engine = None
 
+# Redis key holding the assembled /api/metrics/summary response
+METRICS_SUMMARY_CACHE_KEY = "metrics:summary"
+
+# Encodes large payloads (msgspec Structs included) in one pass, bypassing FastAPI's jsonable_encoder
+_json_encoder = msgspec.json.Encoder()
+
+# Latest /health result and the monotonic time it was taken, kept fresh by _health_refresher
+_cached_health: Optional[HealthResponse] = None
+_cached_health_at = 0.0
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize and cleanup application resources"""
     global connector_manager, conversation_engine
     
     logger.info("🚀 Starting AI Monitoring Agent...")
+    catalog_watch_task = None
+    health_task = None
     
     try:
         # Import connectors here to avoid circular imports
         from .connectors.manager import ConnectorManager
         from .ai import ConversationEngine
+        from .ai.nlp_processor import aclose as close_openai_client
         
-        # Initialize Redis client
-        redis_client = await get_redis_client()
+        # Initialize the pooled Redis client once, before any request needs it
+        await init_redis_client()
         logger.info("✅ Redis connection established")
         
         # Initialize connector manager
         connector_manager = ConnectorManager(settings)
+        await connector_manager.start()
         logger.info("✅ Connector manager initialized")
         
         # Check connector health
@@ -55,10 +70,13 @@ async def lifespan(app: FastAPI):
         # Initialize conversation engine
         if settings.openai_api_key and settings.openai_api_key != "your_openai_api_key_here":
             conversation_engine = ConversationEngine(settings, connector_manager)
+            catalog_watch_task = asyncio.create_task(conversation_engine.watch_connector_changes())
             logger.info("✅ Conversation engine initialized")
         else:
             logger.warning("⚠️ OpenAI API key not configured - conversation engine disabled")
         
+        health_task = asyncio.create_task(_health_refresher())
+        
         logger.info("🎉 AI Monitoring Agent startup complete!")
         
     except Exception as e:
@@ -69,8 +87,16 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("🔄 Shutting down AI Monitoring Agent...")
-    if 'redis_client' in locals():
-        await redis_client.close()
+    if catalog_watch_task:
+        catalog_watch_task.cancel()
+    if health_task:
+        health_task.cancel()
+    if connector_manager:
+        await connector_manager.stop()
+        await connector_manager.close_all()
+    await close_redis_client()
+    if 'close_openai_client' in locals():
+        await close_openai_client()
     logger.info("👋 Shutdown complete")
 
 # Create FastAPI app
@@ -79,17 +105,21 @@ app = FastAPI(
     description=settings.app_description,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
 
-# Add CORS middleware
+# CORS origins, parsed once at import
+CORS_ORIGINS = [origin.strip() for origin in settings.cors_origins.split(",")] if settings.cors_origins != "*" else ["*"]
+
+# Add CORS middleware; explicit methods and headers spare the wildcard handling on every preflight
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.cors_origins.split(",") if settings.cors_origins != "*" else ["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "X-Request-ID"],
 )
 
 @app.get("/", tags=["Root"])
@@ -104,7 +134,34 @@ async def root():
 
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    """Health check endpoint for container orchestration"""
+    """Health check endpoint for container orchestration
+    
+    Answers from the result kept by the background refresher, probing inline only
+    when that result is missing or more than two refresh intervals old.
+    """
+    if _cached_health is None or time.monotonic() - _cached_health_at > settings.health_refresh_interval * 2:
+        return await _refresh_health()
+    return _cached_health
+
+async def _refresh_health() -> HealthResponse:
+    """Probe dependencies and remember the result for /health"""
+    global _cached_health, _cached_health_at
+    
+    _cached_health = await _probe_health()
+    _cached_health_at = time.monotonic()
+    return _cached_health
+
+async def _health_refresher():
+    """Refresh the /health result in the background so probes never wait on Redis or connectors"""
+    while True:
+        await asyncio.sleep(settings.health_refresh_interval)
+        try:
+            await _refresh_health()
+        except Exception as e:
+            logger.error(f"Background health refresh failed: {e}")
+
+async def _probe_health() -> HealthResponse:
+    """Check Redis, the connectors and the conversation engine"""
     checks = {}
     overall_status = "healthy"
     
@@ -148,7 +205,7 @@ async def health_check():
         
         return HealthResponse(
             status=overall_status,
-            timestamp=datetime.utcnow(),
+            timestamp=coarse_utcnow(),
             checks=checks,
             version="1.0.0"
         )
@@ -157,7 +214,7 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         return HealthResponse(
             status="unhealthy",
-            timestamp=datetime.utcnow(),
+            timestamp=coarse_utcnow(),
             checks={"error": str(e)},
             version="1.0.0"
         )
@@ -170,7 +227,7 @@ async def readiness_check():
             status_code=503, 
             detail="Service not ready - conversation engine not initialized"
         )
-    return {"status": "ready", "timestamp": datetime.utcnow()}
+    return {"status": "ready", "timestamp": coarse_utcnow()}
 
 @app.post("/api/chat", response_model=ChatResponse, tags=["Chat"])
 async def chat(
@@ -188,12 +245,12 @@ async def chat(
                 message="I'm not fully configured yet. Please check that your OpenAI API key and monitoring sources are set up correctly in the .env file.",
                 session_id=request.session_id or "default",
                 query_type=None,
-                timestamp=datetime.utcnow(),
+                timestamp=coarse_utcnow(),
                 processing_time=0.0
             )
         
         # Process the conversation
-        start_time = asyncio.get_event_loop().time()
+        start_time = time.monotonic()
         
         response = await conversation_engine.process_message(
             message=request.message,
@@ -202,7 +259,7 @@ async def chat(
             context=request.context or {}
         )
         
-        processing_time = asyncio.get_event_loop().time() - start_time
+        processing_time = time.monotonic() - start_time
         response.processing_time = processing_time
         
         return response
@@ -213,10 +270,30 @@ async def chat(
             message=f"I encountered an error processing your request: {str(e)}. Please try again or check your configuration.",
             session_id=request.session_id or "default",
             query_type=None,
-            timestamp=datetime.utcnow(),
+            timestamp=coarse_utcnow(),
             processing_time=0.0
         )
 
+@app.post("/api/chat/stream", tags=["Chat"])
+async def chat_stream(
+    request: ChatRequest,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
+    """Streaming chat endpoint; the response text is sent as it is generated"""
+    logger.info(f"Streaming chat request from user: {request.message[:100]}...")
+    
+    if not conversation_engine:
+        raise HTTPException(status_code=503, detail="Conversation engine not initialized")
+    
+    return StreamingResponse(
+        conversation_engine.process_message_stream(
+            message=request.message,
+            session_id=request.session_id or "default",
+            user_context=request.context or {}
+        ),
+        media_type="text/plain; charset=utf-8"
+    )
+
 @app.get("/api/sessions/{session_id}/history", tags=["Chat"])
 async def get_session_history(
     session_id: str,
@@ -259,6 +336,14 @@ async def get_metrics_summary(
     try:
         if not connector_manager:
             raise HTTPException(status_code=503, detail="Connector manager not initialized")
+        
+        # Serve the assembled summary from Redis while it is fresh
+        try:
+            cached, = await mget_json([METRICS_SUMMARY_CACHE_KEY])
+            if cached is not None:
+                return Response(content=_json_encoder.encode(cached), media_type="application/json")
+        except Exception as e:
+            logger.warning(f"Metrics summary cache unavailable: {e}")
             
         # Get summary from all connectors
         summaries = await connector_manager.get_all_metrics_summary()
@@ -270,14 +355,21 @@ async def get_metrics_summary(
         for services in all_services.values():
             all_services_list.extend(services)
         
-        return {
+        summary = {
             "metrics_count": total_metrics,
             "services": list(set(all_services_list)),
             "connectors": list(summaries.keys()),
             "connector_summaries": summaries,
-            "last_updated": datetime.utcnow()
+            "last_updated": coarse_utcnow()
         }
         
+        try:
+            await mset_json({METRICS_SUMMARY_CACHE_KEY: summary}, settings.catalog_cache_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to cache metrics summary: {e}")
+        
+        return Response(content=_json_encoder.encode(summary), media_type="application/json")
+    
     except Exception as e:
         logger.error(f"Failed to get metrics summary: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -296,8 +388,9 @@ async def get_active_alerts(
         all_alerts = []
         for connector_alerts in alerts_results.values():
             all_alerts.extend(connector_alerts)
-            
-        return {"alerts": all_alerts, "count": len(all_alerts), "timestamp": datetime.utcnow()}
+        
+        payload = {"alerts": all_alerts, "count": len(all_alerts), "timestamp": coarse_utcnow()}
+        return Response(content=_json_encoder.encode(payload), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Failed to get active alerts: {e}")
@@ -307,21 +400,21 @@ async def get_active_alerts(
 async def http_exception_handler(request, exc):
     """Global HTTP exception handler"""
     logger.error(f"HTTP Exception: {exc.status_code} - {exc.detail}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
-        content={"error": exc.detail, "timestamp": datetime.utcnow().isoformat()}
+        content={"error": exc.detail, "timestamp": coarse_utcnow()}
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Global exception handler"""
     logger.error(f"Unexpected error: {exc}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error", 
             "message": str(exc) if settings.environment == "development" else "An unexpected error occurred",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": coarse_utcnow()
         }
     )
 
@@ -330,6 +423,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
         reload=settings.environment == "development",
         log_level=settings.log_level.lower()
     )
\ No newline at end of file
@@ -1,7 +1,21 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+from typing import Optional, Dict, Any, Iterator, List, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from enum import Enum
+import msgspec
+import numpy as np
+import time
+
+_now_cache: tuple = (-1, None)
+
+def coarse_utcnow() -> datetime:
+    """Naive UTC now like datetime.utcnow(), but computed at most once per second and reused"""
+    global _now_cache
+    second = int(time.monotonic())
+    if _now_cache[0] != second:
+        _now_cache = (second, datetime.utcnow())
+    return _now_cache[1]
 
 class MessageType(str, Enum):
     USER = "user"
@@ -19,7 +33,7 @@ class QueryType(str, Enum):
 class ChatMessage(BaseModel):
     type: MessageType
     content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=coarse_utcnow)
     metadata: Optional[Dict[str, Any]] = None
 
 class ChatRequest(BaseModel):
@@ -27,24 +41,54 @@ class ChatRequest(BaseModel):
     session_id: Optional[str] = None
     context: Optional[Dict[str, Any]] = None
 
-class MetricData(BaseModel):
-    metric_name: str
-    values: List[Dict[str, Any]]
-    labels: Dict[str, str] = Field(default_factory=dict)
-    query: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+class MetricData(msgspec.Struct, frozen=True, gc=False):
+    """One metric sample as produced by the connectors
+    
+    A msgspec Struct rather than a pydantic model: connectors create one per sample from
+    data they have already parsed, so validation would only add cost. Instances hold no
+    reference cycles, which lets them skip garbage-collector tracking.
+    """
+    name: str
+    value: float
+    timestamp: datetime  # Timezone-aware UTC, as reported by the source
+    labels: Mapping[str, str] = {}
     unit: Optional[str] = None
-    description: Optional[str] = None
 
-class AlertData(BaseModel):
-    alert_name: str
+@dataclass(slots=True)
+class MetricSeries:
+    """Columnar form of one timeseries: UTC timestamps and values as arrays sharing one labels mapping
+    
+    labels may be shared with other series and with every point from iter_points(); treat it as read-only.
+    """
+    name: str
+    unit: str
+    labels: Mapping[str, str]
+    timestamps: np.ndarray  # datetime64[ns], UTC
+    values: np.ndarray  # float64
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def iter_points(self) -> Iterator[MetricData]:
+        """Materialize per-point MetricData objects for consumers that need them"""
+        timestamps = self.timestamps.astype('datetime64[us]').tolist()
+        for timestamp, value in zip(timestamps, self.values.tolist()):
+            yield MetricData(
+                name=self.name,
+                value=value,
+                timestamp=timestamp.replace(tzinfo=timezone.utc),
+                labels=self.labels,
+                unit=self.unit
+            )
+
+class AlertData(msgspec.Struct, frozen=True, gc=False):
+    """One active alert as produced by the connectors"""
+    name: str
     severity: str
-    status: str
-    labels: Dict[str, str]
-    annotations: Dict[str, str] = Field(default_factory=dict)
-    active_at: datetime
-    value: Optional[float] = None
-    fingerprint: Optional[str] = None
+    description: str
+    service: str
+    timestamp: datetime
+    labels: Dict[str, Any] = {}
 
 class ChatResponse(BaseModel):
     message: str
@@ -52,10 +96,10 @@ class ChatResponse(BaseModel):
     session_id: str
     query_type: Optional[QueryType] = None
     data: Optional[Dict[str, Any]] = None
-    metrics: Optional[List[MetricData]] = None
-    alerts: Optional[List[AlertData]] = None
+    metrics: Optional[List[Dict[str, Any]]] = None  # MetricData via msgspec.to_builtins
+    alerts: Optional[List[Dict[str, Any]]] = None  # AlertData via msgspec.to_builtins
     suggestions: Optional[List[str]] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=coarse_utcnow)
     processing_time: Optional[float] = None
     confidence: Optional[float] = None
 
@@ -63,7 +107,7 @@ class HealthCheck(BaseModel):
     service: str
     status: str  # healthy, unhealthy, degraded
     message: Optional[str] = None
-    last_check: datetime = Field(default_factory=datetime.utcnow)
+    last_check: datetime = Field(default_factory=coarse_utcnow)
 
 class HealthResponse(BaseModel):
     status: str  # healthy, unhealthy, degraded
@@ -74,7 +118,7 @@ class HealthResponse(BaseModel):
 
 class ErrorResponse(BaseModel):
     error: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=coarse_utcnow)
     request_id: Optional[str] = None
     details: Optional[Dict[str, Any]] = None
 
@@ -86,6 +130,13 @@ class SessionInfo(BaseModel):
     message_count: int
     context: Optional[Dict[str, Any]] = None
 
+class ConversationSummary(BaseModel):
+    session_id: str
+    message_count: int
+    start_time: datetime
+    last_activity: datetime
+    topics: List[str] = Field(default_factory=list)
+
 class MetricsSummary(BaseModel):
     total_metrics: int
     services: List[str]
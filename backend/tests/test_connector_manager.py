@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.connectors.base import BaseConnector, instrumented
+from app.connectors.manager import CircuitBreaker, ConnectorManager
+
+def make_settings(**overrides):
+    """Settings with no real connectors configured"""
+    values = dict(
+        prometheus_url="",
+        prometheus_username=None,
+        prometheus_password=None,
+        alertmanager_url="",
+        promql_cache_ttl=30,
+        azure_subscription_id=None,
+        azure_client_id=None,
+        azure_client_secret=None,
+        azure_tenant_id=None,
+        connector_timeout=5,
+        connector_concurrency=10,
+        connector_health_ttl=10,
+        connector_health_interval=30,
+        connector_breaker_threshold=3,
+        connector_breaker_reset=30,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+class FailingConnector(BaseConnector):
+    """Connector whose backend refuses every request"""
+    
+    def __init__(self):
+        super().__init__("failing")
+        self.query_calls = 0
+    
+    @instrumented
+    async def health_check(self) -> bool:
+        raise ConnectionRefusedError("connection refused")
+    
+    @instrumented
+    async def query_metrics(self, query: str, **kwargs):
+        self.query_calls += 1
+        raise ConnectionRefusedError("connection refused")
+    
+    async def get_active_alerts(self):
+        return []
+    
+    async def get_services(self):
+        return []
+    
+    async def get_metrics_list(self):
+        return []
+
+def make_manager(connector: BaseConnector) -> ConnectorManager:
+    manager = ConnectorManager(make_settings())
+    manager.connectors[connector.name] = connector
+    manager._breakers[connector.name] = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    return manager
+
+@pytest.mark.asyncio
+async def test_raising_connector_opens_breaker():
+    connector = FailingConnector()
+    manager = make_manager(connector)
+    
+    try:
+        for _ in range(3):
+            results = await manager.query_all_connectors("up")
+            assert results == {"failing": []}
+        
+        assert manager._breakers["failing"].state == CircuitBreaker.OPEN
+        
+        # With the circuit open the connector is no longer called
+        results = await manager.query_all_connectors("up")
+        assert results == {"failing": []}
+        assert connector.query_calls == 3
+    finally:
+        await manager.stop()
+
+@pytest.mark.asyncio
+async def test_query_failure_marks_connector_unhealthy():
+    manager = make_manager(FailingConnector())
+    
+    try:
+        await manager.query_all_connectors("up")
+        
+        assert await manager.health_check_all() == {"failing": False}
+        assert await manager.get_healthy_connectors() == []
+    finally:
+        await manager.stop()
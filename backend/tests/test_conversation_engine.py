@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.ai.conversation_engine import ConversationEngine
+from app.config import Settings
+from app.models import MessageType, MetricData
+
+class UnavailableRedis:
+    """Redis client whose server is down; the engine treats every call as a cache miss"""
+
+    def __getattr__(self, name):
+        raise ConnectionError("redis unavailable")
+
+class StubPrometheus:
+    """Prometheus connector returning a single CPU sample"""
+
+    def __init__(self):
+        self.queries = []
+
+    async def query_metrics(self, query: str, **kwargs):
+        self.queries.append(query)
+        return [MetricData(
+            name="cpu_usage",
+            value=42.0,
+            timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            labels={"service": "api"}
+        )]
+
+class StubConnectorManager:
+    """Connector manager with only the stub Prometheus connector configured"""
+
+    def __init__(self):
+        self.prometheus = StubPrometheus()
+
+    def get_connector(self, name: str):
+        return self.prometheus if name == "prometheus" else None
+
+    def list_connectors(self):
+        return ["prometheus"]
+
+    def version(self) -> int:
+        return 0
+
+    async def get_all_services(self, concurrency: int = 10):
+        return {"prometheus": ["api"]}
+
+    async def get_all_metrics_summary(self, concurrency: int = 10):
+        return {"prometheus": {"metric_names": ["cpu_usage"]}}
+
+class StubNLPProcessor:
+    """NLP processor that parses every message as a CPU metrics query and streams fixed chunks"""
+
+    def __init__(self, chunks=None, error: Exception = None):
+        self.chunks = chunks or []
+        self.error = error
+
+    async def parse_user_query(self, message, services, metrics):
+        return {
+            'intent': 'cpu',
+            'query_type': 'metrics',
+            'original_query': message,
+            'metrics': ['cpu_usage'],
+            'services': ['api'],
+            'time_range': '1h'
+        }
+
+    async def generate_prometheus_query(self, parsed_query):
+        return 'cpu_usage{service="api"}'
+
+    async def generate_response_stream(self, query, metrics, alerts, context=None, fallback=True):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+    def fallback_response(self, query, metrics, alerts):
+        return f"Retrieved {len(metrics)} metrics for your query."
+
+def make_engine(nlp_processor: StubNLPProcessor) -> ConversationEngine:
+    engine = ConversationEngine(Settings(openai_api_key="test"), StubConnectorManager())
+    engine.nlp_processor = nlp_processor
+    engine.redis = UnavailableRedis()
+    return engine
+
+async def collect(engine: ConversationEngine, message: str):
+    return [chunk async for chunk in engine.process_message_stream(message, "session-1")]
+
+@pytest.mark.asyncio
+async def test_stream_yields_generated_chunks():
+    engine = make_engine(StubNLPProcessor(chunks=["CPU usage on api ", "is at 42%."]))
+
+    chunks = await collect(engine, "what is the cpu usage of api?")
+
+    assert chunks == ["CPU usage on api ", "is at 42%."]
+    assert "".join(chunks) == "CPU usage on api is at 42%."
+    assert engine.connector_manager.prometheus.queries == ['cpu_usage{service="api"}']
+
+@pytest.mark.asyncio
+async def test_stream_sends_fallback_when_generation_fails():
+    engine = make_engine(StubNLPProcessor(error=RuntimeError("openai unavailable")))
+    cached = []
+
+    async def record_cache_set(message_norm, parsed_query, response):
+        cached.append(response)
+    engine._response_cache_set = record_cache_set
+
+    chunks = await collect(engine, "what is the cpu usage of api?")
+
+    assert chunks == ["Retrieved 1 metrics for your query."]
+    # A stand-in answer must not be served to later identical questions
+    assert cached == []
+
+@pytest.mark.asyncio
+async def test_process_message_returns_assistant_message():
+    engine = make_engine(StubNLPProcessor(chunks=["CPU usage on api is at 42%."]))
+
+    message = await engine.process_message("what is the cpu usage of api?", "session-1")
+
+    assert message.type == MessageType.ASSISTANT
+    assert message.content == "CPU usage on api is at 42%."
+    assert message.metadata["connectors_used"] == ("prometheus",)